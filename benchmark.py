@@ -0,0 +1,168 @@
+"""
+Benchmarks the game with scripted scenarios (a bot plays, no human input) and prints the results as json
+
+    python benchmark.py                         # every scenario through Game (needs a display)
+    python benchmark.py --headless              # the same scenarios through World only
+    python benchmark.py --output before.json    # keep the results to compare against another commit
+"""
+import argparse
+import functools
+import json
+import platform
+import sys
+import time
+
+import bots
+from profiler import percentile
+from world import World
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+IMMORTAL = 10 ** 6  # Lives given to the bot so a scenario never stops on the game over prompt
+
+
+class Scenario:
+    """
+    Scripted starting state plus an optional change applied after every frame
+    """
+    def __init__(self, name, frames, points=0, everyFrame=None, description=""):
+        """
+        :param name: Name used in the results
+        :param frames: Default amount of frames to run
+        :param points: Points the world starts with (through World.setPoints, so the speed follows)
+        :param everyFrame: Function called with the world after every frame
+        :param description: What the scenario covers
+        """
+        self.name = name
+        self.frames = frames
+        self.points = points
+        self.everyFrame = everyFrame
+        self.description = description
+
+    def setUp(self, state):
+        """
+        :param state: World to prepare
+        """
+        state.player.lives = IMMORTAL
+        if self.points:
+            state.setPoints(self.points)
+
+
+def hudChurn(state):
+    """
+    Changes a HUD value every frame
+    """
+    state.addPoints(10)
+
+
+SCENARIOS = (
+    Scenario("early", 1200, description="fresh game, points bubble only"),
+    Scenario("boss", 1200, points=100, description="boss spawned at 100 points and fought"),
+    Scenario("maxspeed", 1200, points=330, description="past the 320 point speed cap"),
+    Scenario("hud", 5000, everyFrame=hudChurn, description="long session with a HUD update every frame"),
+)
+
+
+def peakRss():
+    """
+    Peak resident set size of the process in kilobytes (None where it can't be measured)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, kilobytes elsewhere
+
+
+def latencySummary(latencies):
+    """
+    :param latencies: Frame times in milliseconds
+    """
+    ordered = sorted(latencies)
+    return {"mean": sum(ordered) / len(ordered), "p50": percentile(ordered, 0.5), "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99), "max": ordered[-1]}
+
+
+def runGameScenario(scenario, frames, seed, renderer="turtle"):
+    """
+    Runs a scenario through Game (rendering included), one render per frame as fast as possible
+    """
+    import game  # Needs Tk and a display
+    newGame = game.Game(seed=seed, renderer=renderer)
+    state = newGame.world
+    scenario.setUp(state)
+    newGame.prepare()
+    ticksPerFrame = max(1, round(newGame.tickRate / newGame.frameRate))
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for frame in range(frames):
+        frameStart = clock()
+        for tick in range(ticksPerFrame):
+            newGame.inputs.extend(bots.greedyChase(state))
+            newGame.tick()
+        if scenario.everyFrame:
+            scenario.everyFrame(state)
+        newGame.renderFrame()
+        latencies.append((clock() - frameStart) * 1000)
+    elapsed = clock() - start
+    result = {"frames": frames, "fps": frames / elapsed, "latencyMs": latencySummary(latencies),
+              "peakRssKb": peakRss(), "canvasItems": len(newGame.renderer.canvas.find_all()),
+              "turtles": len(newGame.renderer.turtles()), "drawCalls": newGame.drawCalls(),
+              "hudRedraws": newGame.hud.redraws(), "points": state.points}
+    newGame.renderer.close()  # Next scenario starts from an empty screen
+    return result
+
+
+def runHeadlessScenario(scenario, frames, seed):
+    """
+    Runs a scenario through World only (no turtle, no display)
+    """
+    state = World(seed)
+    scenario.setUp(state)
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for frame in range(frames):
+        frameStart = clock()
+        state.step(bots.greedyChase(state))
+        if scenario.everyFrame:
+            scenario.everyFrame(state)
+        latencies.append((clock() - frameStart) * 1000)
+    elapsed = clock() - start
+    return {"frames": frames, "fps": frames / elapsed, "latencyMs": latencySummary(latencies),
+            "peakRssKb": peakRss(), "points": state.points}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game loop and rules")
+    parser.add_argument("--headless", action="store_true", help="run the rules only, without turtle rendering")
+    parser.add_argument("--frames", type=int, default=None, help="frames per scenario (default: per scenario)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for spawn positions")
+    parser.add_argument("--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS],
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--renderer", choices=("turtle", "canvas"), default="turtle", help="renderer backend")
+    parser.add_argument("--output", help="also write the json results to this file")
+    args = parser.parse_args(argv)
+
+    runScenario = runHeadlessScenario if args.headless else functools.partial(runGameScenario,
+                                                                              renderer=args.renderer)
+    results = {"python": platform.python_version(), "platform": platform.platform(),
+               "mode": "headless" if args.headless else "game", "renderer": None if args.headless else args.renderer,
+               "seed": args.seed, "scenarios": {}}
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        results["scenarios"][scenario.name] = runScenario(scenario, args.frames or scenario.frames, args.seed)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            outputFile.write(output)
+
+
+if __name__ == "__main__":
+    main()
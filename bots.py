@@ -0,0 +1,84 @@
+import math
+
+import world
+
+TURNTOLERANCE = 15  # Degrees off target before a bot turns (a turn is 30 degrees)
+
+
+def steerTowards(player, x, y):
+    """
+    :param player: world.Entity that is steered
+    :param x: x axis to head for
+    :param y: y axis to head for
+    Inputs that turn the player towards a point (at most one turn per tick)
+    """
+    target = math.degrees(math.atan2(y - player.y, x - player.x))
+    difference = (target - player.heading + 180) % 360 - 180
+    if difference > TURNTOLERANCE:
+        return [world.LEFT]
+    if difference < -TURNTOLERANCE:
+        return [world.RIGHT]
+    return []
+
+
+def greedyChase(state):
+    """
+    :param state: World the bot plays in
+    Heads for the dazzed boss when it can be hit, otherwise for the slow bubble if it is out, otherwise for the
+    points bubble
+    """
+    if state.bossDazzed and state.boss.visible and state.boss.lives >= 1:
+        target = state.boss
+    elif state.slowBubble.x < world.OFFSCREEN[0]:
+        target = state.slowBubble
+    else:
+        target = state.pointsBubble
+    return steerTowards(state.player, target.x, target.y)
+
+
+LOOKAHEAD = 12  # Ticks (at 60 per second) ahead the wall avoiding bot checks its path for walls and bosses
+BOSSMARGIN = 90  # Distance the wall avoiding bot keeps from a boss it can't hit
+
+
+def safeAhead(state, heading):
+    """
+    :param state: World the bot plays in
+    :param heading: Heading to check
+    True if LOOKAHEAD ticks along the heading the player is still inside the arena and away from any boss it
+    can't hit
+    """
+    player = state.player
+    distance = player.charSpeed * LOOKAHEAD
+    stepX = distance * math.cos(math.radians(heading)) / 3
+    stepY = distance * math.sin(math.radians(heading)) / 3
+    aheadX = player.x + 3 * stepX
+    aheadY = player.y + 3 * stepY
+    if not (world.BOUNDARYX[0] < aheadX < world.BOUNDARYX[1] and world.BOUNDARYY[0] < aheadY < world.BOUNDARYY[1]):
+        return False
+    if not state.bossDazzed:
+        for boss in state.bosses:
+            if boss.visible:
+                for point in (1, 2, 3):  # A few points along the path, not just its end
+                    if abs(boss.x - player.x - point * stepX) < BOSSMARGIN and \
+                            abs(boss.y - player.y - point * stepY) < BOSSMARGIN:
+                        return False
+    return True
+
+
+TURNS = {(): 0, (world.LEFT,): 30, (world.RIGHT,): -30}
+
+
+def wallAvoiding(state):
+    """
+    :param state: World the bot plays in
+    Plays like greedyChase, but only takes a turn (or goes straight) if the path ahead stays inside the arena and
+    away from a boss that isn't dazzed, and heads back to the middle if no option is safe
+    """
+    preferred = tuple(greedyChase(state))
+    for option in (preferred,) + tuple(turn for turn in TURNS if turn != preferred):
+        if safeAhead(state, state.player.heading + TURNS[option]):
+            return list(option)
+    return steerTowards(state.player, *world.SAFEPOS)
+
+
+POLICIES = {"greedy": greedyChase, "wallAvoiding": wallAvoiding}
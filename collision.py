@@ -0,0 +1,165 @@
+from array import array
+
+SMALLGRID = 16  # Up to this many entities, checking the seekers against everything beats building the grid
+
+
+def segmentHitsBox(x0, y0, x1, y1, left, right, bottom, top):
+    """
+    True if the segment from (x0, y0) to (x1, y1) touches the box (a point when both ends are the same)
+    """
+    low = 0.0
+    high = 1.0
+    for start, end, lowest, highest in ((x0, x1, left, right), (y0, y1, bottom, top)):
+        delta = end - start
+        if delta == 0:
+            if start < lowest or start > highest:
+                return False
+            continue
+        near = (lowest - start) / delta
+        far = (highest - start) / delta
+        if near > far:
+            near, far = far, near
+        low = max(low, near)
+        high = min(high, far)
+        if low > high:
+            return False
+    return True
+
+
+def segmentExit(x0, y0, x1, y1, left, right, bottom, top):
+    """
+    Fraction (0 to 1) of the segment from (x0, y0) to (x1, y1) travelled when it leaves the box, 1 if it ends
+    inside and 0 if it starts outside
+    """
+    fraction = 1.0
+    for start, end, lowest, highest in ((x0, x1, left, right), (y0, y1, bottom, top)):
+        if end > highest:
+            fraction = min(fraction, (highest - start) / (end - start) if start <= highest else 0.0)
+        elif end < lowest:
+            fraction = min(fraction, (lowest - start) / (end - start) if start >= lowest else 0.0)
+    return fraction
+
+
+class CollisionGrid:
+    """
+    Collision subsystem for every entity of a world at once
+
+    Positions and reaches are kept in contiguous arrays, a uniform grid is used as broad phase and pairs returns
+    every overlapping pair of the frame in one call. Two entities overlap when each axis is within the larger of
+    their reaches (the same box test the game always used: the player's position inside the 15 unit box around a
+    bubble, or the 40 unit box around the boss).
+
+    Only pairs whose kinds are meant to collide are tested: an entity's mask holds the kinds it looks for.
+    A seeker that moved along a segment this frame (see sweep) is tested with the whole segment, so a fast
+    entity can't pass through a box between two frames.
+    """
+    def __init__(self, cellSize=None):
+        """
+        :param cellSize: Grid cell size, defaults to the largest reach so overlaps only span neighbouring cells
+        """
+        self.cellSize = cellSize
+        self.entities = []
+        self.xs = array("d")
+        self.ys = array("d")
+        self.reaches = array("d")
+        self.kinds = array("l")
+        self.masks = array("l")
+        self.sweeps = {}  # Index: (x, y) the seeker moved from this frame
+
+    def add(self, entity, reach, kind, mask=0):
+        """
+        :param entity: Entity with x and y attributes
+        :param reach: Half the width of its collision box
+        :param kind: Bit identifying the kind of entity
+        :param mask: Bits of the kinds it collides with
+        Returns the index of the entity
+        """
+        self.entities.append(entity)
+        self.xs.append(entity.x)
+        self.ys.append(entity.y)
+        self.reaches.append(reach)
+        self.kinds.append(kind)
+        self.masks.append(mask)
+        return len(self.entities) - 1
+
+    def sweep(self, index, x, y):
+        """
+        :param index: Index of a seeker
+        :param x: x axis it moved from this frame
+        :param y: y axis it moved from this frame
+        The next pairs tests the segment from there to its current position (then forgets it)
+        """
+        self.sweeps[index] = x, y
+
+    def sync(self):
+        """
+        Copies the current entity positions into the arrays
+        """
+        xs = self.xs
+        ys = self.ys
+        for index, entity in enumerate(self.entities):
+            xs[index] = entity.x
+            ys[index] = entity.y
+
+    def pairs(self):
+        """
+        Every overlapping pair as (entity, entity), ordered by kind (lower kind bit first)
+
+        All entities are bucketed into the grid, then only entities with a mask (player, bosses) look at the 3x3
+        cells around them (around their whole segment if they swept), so the cost is linear in the amount of
+        entities plus the candidates near those entities instead of every entity against every other one.
+        """
+        self.sync()
+        xs, ys, reaches, masks = self.xs, self.ys, self.reaches, self.masks
+        seekers = [index for index in range(len(xs)) if masks[index]]
+        found = []
+        if len(xs) <= SMALLGRID:  # The normal arena: a handful of entities
+            everything = range(len(xs))
+            for first in seekers:
+                self.test(first, everything, found)
+            self.sweeps.clear()
+            return found
+
+        cellSize = self.cellSize or max(reaches, default=1) or 1
+        cells = {}
+        for index in range(len(xs)):
+            cells.setdefault((int(xs[index] // cellSize), int(ys[index] // cellSize)), []).append(index)
+        for first in seekers:
+            fromX, fromY = self.sweeps.get(first, (xs[first], ys[first]))
+            for cellX in range(int(min(fromX, xs[first]) // cellSize) - 1, int(max(fromX, xs[first]) // cellSize) + 2):
+                for cellY in range(int(min(fromY, ys[first]) // cellSize) - 1,
+                                   int(max(fromY, ys[first]) // cellSize) + 2):
+                    candidates = cells.get((cellX, cellY))
+                    if candidates:
+                        self.test(first, candidates, found)
+        self.sweeps.clear()
+        return found
+
+    def test(self, first, candidates, found):
+        """
+        :param first: Index of the entity looking for others
+        :param candidates: Indexes of the entities to test against it
+        :param found: List the overlapping pairs are added to
+        """
+        xs, ys, reaches, kinds, masks = self.xs, self.ys, self.reaches, self.kinds, self.masks
+        x = xs[first]
+        y = ys[first]
+        mask = masks[first]
+        kind = kinds[first]
+        swept = self.sweeps.get(first)
+        for second in candidates:
+            if second == first or not mask & kinds[second]:
+                continue
+            if masks[second] & kind and second < first:
+                continue  # Both look for each other, the lower index reports the pair
+            reach = reaches[first] if reaches[first] > reaches[second] else reaches[second]
+            if swept:
+                touching = segmentHitsBox(swept[0], swept[1], x, y, xs[second] - reach, xs[second] + reach,
+                                          ys[second] - reach, ys[second] + reach)
+            else:
+                touching = abs(x - xs[second]) <= reach and abs(y - ys[second]) <= reach
+            if touching:
+                if kind > kinds[second]:
+                    found.append((self.entities[second], self.entities[first]))
+                else:
+                    found.append((self.entities[first], self.entities[second]))
@@ -0,0 +1,123 @@
+import asyncio
+import queue
+import threading
+
+import world
+
+
+class InputQueue:
+    """
+    Thread safe queue of world inputs (see world.INPUTS)
+
+    Tk key callbacks and the keyboard listener thread only push, the game loop drains the queue once per tick,
+    so player state is only ever changed by the thread running the world.
+    """
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+
+    def push(self, name):
+        """
+        :param name: Input to apply on the next tick
+        """
+        self.queue.put(name)
+
+    def extend(self, names):
+        """
+        :param names: Inputs to apply on the next tick
+        """
+        for name in names:
+            self.queue.put(name)
+
+    def drain(self):
+        """
+        Every input pushed since the last drain, in order
+        """
+        if self.queue.empty():
+            return ()
+        inputs = []
+        while True:
+            try:
+                inputs.append(self.queue.get_nowait())
+            except queue.Empty:
+                return inputs
+
+
+class AsyncInputQueue:
+    """
+    InputQueue delivering the inputs through an asyncio.Queue of the game's event loop (see Game.run)
+
+    Pushes from the loop's thread (Tk key callbacks) go straight in, pushes from other threads (the keyboard
+    listener) are handed to the loop with call_soon_threadsafe.
+    """
+    def __init__(self, loop):
+        """
+        :param loop: Running asyncio event loop that owns the queue
+        """
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.thread = threading.get_ident()
+
+    def push(self, name):
+        """
+        :param name: Input to apply on the next tick
+        """
+        if threading.get_ident() == self.thread:
+            self.queue.put_nowait(name)
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, name)
+
+    def extend(self, names):
+        """
+        :param names: Inputs to apply on the next tick
+        """
+        for name in names:
+            self.push(name)
+
+    def drain(self):
+        """
+        Every input delivered since the last drain, in order
+        """
+        if self.queue.empty():
+            return ()
+        inputs = []
+        while True:
+            try:
+                inputs.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return inputs
+
+
+def bindKeys(screen, inputs):
+    """
+    :param screen: turtle screen or renderer (see renderers.py) the arrow keys are bound on
+    :param inputs: InputQueue (or AsyncInputQueue) the turns are pushed to
+    Binds the arrow keys once (Left/Right turn the player)
+    """
+    screen.onkey(lambda: inputs.push(world.LEFT), "Left")
+    screen.onkey(lambda: inputs.push(world.RIGHT), "Right")
+    screen.listen()
+
+
+def startKeyboardListener(inputs):
+    """
+    :param inputs: InputQueue (or AsyncInputQueue) the keys are pushed to
+    Starts the pynput listener thread (ESC, SPACE, U and SHIFT) and returns it
+    """
+    from pynput import keyboard  # Slow to import (it loads its platform backend), only needed from here on
+    def on_press(key):
+        if key == keyboard.Key.esc:
+            inputs.push(world.PAUSE)
+        if key == keyboard.Key.space:
+            inputs.push(world.RESUME)
+        if key == keyboard.KeyCode(85):
+            """
+            If the player is stuck, it moves the player to a safe position (func stuckCheck in Class World),
+            sets lives to 3 and disables movement until re-enabled
+            """
+            inputs.push(world.UNSTICK)
+        if key == keyboard.Key.shift_l or key == keyboard.Key.shift_r:  # Use a slow bubble which lowers player speed by 1
+            inputs.push(world.SLOW)
+    listener = keyboard.Listener(on_press=on_press)
+    listener.daemon = True
+    listener.start()
+    return listener
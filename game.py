@@ -1,276 +1,116 @@
-import turtle
-from tkinter import messagebox
-import random
+import asyncio
+import atexit
+import bisect
 import time
-import keyboard
-import threading
-from pynput import keyboard
-from xml.dom import minidom
-import xml.etree.cElementTree as ET
-
-lock = threading.Lock()
-
-
-class Player:
-    """
-    Create a new player (Turtle)
-    """
-    def __init__(self, colour="blue", shape="triangle", xpos=0, ypos=0, charSpeed=0, hidden=False):
-        self.player = turtle.Turtle()
-        self.player.color(colour)
-        self.player.shape(shape)
-        self.player.penup()  # Don't leave any traces when moving
-        self.player.setposition(xpos, ypos)  # Player position
-        self.charSpeed = charSpeed  # Amount of speed player has
-        self.player.speed(self.charSpeed)  # Player speed
-        self.playerMove = True  # Player movement
-        self.lives = 3  # Player lives
-        self.slowBubbles = 0
-        self.MINSPEED = 1
-        self.MAXSPEED = 7.4
-        self.needsShowing = False   # for boss and slow bubble
-        self.needsUnsticking = False
-        self.dispNeedsUpdating = False
-        if hidden:
-            self.player.hideturtle()
-
-    def turnLeft(self):
-        """
-        Turns player left 30 degrees
-        """
-        self.player.left(30)
-
-    def turnRight(self):
-        """
-        Turns player right 30 degrees
-        """
-        self.player.right(30)
-
-    def rotate(self):
-        """
-        Rotate player 180 degrees
-        """
-        self.player.forward(-3)  # less wall glitches
-        self.player.left(180)
-
-    def changeSpeed(self, amount, replace=False):
-        """
-        :param amount: Amount to increase or decrease the speed by/ Amount to change player speed to if replace
-        is set to True
-        :param replace: Replaces player speed to the specified amount if set to True
-
-        Increases/Decreases speed by specified amount or changes the amount completely to the specified amount if replace
-        is set to True
-        """
-        if not replace:
-            self.charSpeed += amount
-        else:
-            self.charSpeed = amount
-
-    def changeColour(self, colour):
-        """
-        :param colour: Colour to change player to
-        Changes player colour
-        """
-        self.player.color(colour)
-
-    def playerMoving(self):
-        """
-        Checks if player can move or not
-        """
-        if self.playerMove:
-            self.player.forward(self.charSpeed)
-
-    def enableMovement(self):
-        """
-        Allows player movement
-        """
-        self.playerMove = True
-
-    def disableMovement(self):
-        """
-        Stops player movement
-        """
-        self.playerMove = False
-
-    def getPos(self, co):
-        """
-        :param co: Which coordinate to receive
-            options:(x, y, xy (returns both x and y) )
-
-        Retrieve player position
-        """
-        if co == 'x':
-            return self.player.pos()[0]
-        elif co == 'y':
-            return self.player.pos()[1]
-        elif co == 'xy':
-            return self.player.pos()
-
-    def changePos(self, x, y):
-        """
-        :param x: x axis to move to
-        :param y: y axis to move to
-        Change player position
-        """
-        self.player.setpos(x, y)
-
-    def chainMove(self):
-        """
-        Moves in a certain sequence (Used for boss battle after getting hit)
-        """
-        self.player.forward(-220)
-        time.sleep(0.5)
-        self.player.forward(220)
-
-    def changeSize(self, x, y):
-        """
-        Change player size
-        """
-        self.player.turtlesize(x, y)
-
-    def setLives(self, amount):
-        """
-        Set the amount of lives player has
-        """
-        self.lives = amount
-
-    def keyboardThread(self, delay):
-        """
-        Deals with all keyboard related functions
-        """
-        time.sleep(delay)
-
-        def on_press(key):
-            if key == keyboard.Key.esc:
-                self.disableMovement()
-            if key == keyboard.Key.space:
-                self.enableMovement()
-            if key == keyboard.KeyCode(85):
-                """
-                If the player is stuck, it moves the player to a safe position (func stuckCheck in Class Game),
-                sets lives to 3 and disables movement until re-enabled
-                """
-                self.needsUnsticking = True
-                self.lives = 3
-                self.disableMovement()
-            if key == keyboard.Key.shift_l or key == keyboard.Key.shift_r:  # Use a slow bubble which lowers player speed by 1
-                if self.slowBubbles >= 1:
-                    if self.charSpeed > self.MINSPEED:
-                        self.slowBubbles -= 1
-                        self.changeSpeed(-1)
-                        self.dispNeedsUpdating = True
-        listener = keyboard.Listener(on_press=on_press)
-        listener.start()
-
-    def hideTurtle(self):
-        """
-        Hides the player
-        """
-        self.player.hideturtle()
-
-    def showTurtle(self):
-        """
-        Shows the player
-        """
-        self.player.showturtle()
+import controls
+from governor import FrameGovernor
+from hud import Hud
+from profiler import FrameProfiler
+from renderers import RENDERERS, RenderProxy, drawCalls
+from replay import Playback, Recorder
+from scores import ScoreStore
+from telemetry import TelemetryLog
+import world
+from world import World
+
+TICKRATE = 60  # Simulation ticks per second (game speed is tied to this, not to the host CPU)
+FRAMERATE = 60  # Rendered frames per second
+MAXFRAMETIME = 0.25  # Longest stretch of time simulated after a stall (e.g. a messagebox)
+OVERLAYINTERVAL = 30  # Frames between profiler overlay refreshes
+NAMELENGTH = 16  # Longest name typed on the game over prompt
+POINTSINTERVAL = 5  # Seconds of game time between two telemetry "points" records
+# Lowest high score of each player colour, ascending (the game's ranges: green above 300, orange up to 1999)
+ACHIEVEMENTS = ((301, "green"), (700, "purple"), (1000, "orange"), (2000, "gold"), (3000, (185, 242, 255)))
+ACHIEVEMENTSCORES = [score for score, colour in ACHIEVEMENTS]
 
 
 class Game:
     """
-    Game rules, initiation and management
+    Game initiation and management, draws the World with a renderer backend (turtle by default)
     """
-    def __init__(self):
-        self.setup = turtle.Screen()  # setup screen
-        self.setup.bgcolor("white")  # screen colour
+    def __init__(self, tickRate=TICKRATE, frameRate=FRAMERATE, profile=None, seed=None, pointsBubbles=1, bosses=1,
+                 record=None, replay=None, fastForward=0, renderer="turtle", telemetry=None, frameBudget=None):
+        """
+        :param tickRate: Simulation ticks per second
+        :param frameRate: Rendered frames per second (independent from tickRate)
+        :param profile: File to dump frame timings to at exit, enables instrumentation and the on screen overlay
+        :param seed: Seed for bubble spawn positions (random if not given)
+        :param pointsBubbles: Amount of points bubbles in the arena
+        :param bosses: Amount of bosses in the arena
+        :param record: File to record the seed and inputs of every game to (see replay.py)
+        :param replay: Recording to play back instead of reading the keyboard (its tick rate and arena are used)
+        :param fastForward: Ticks of the replay to run without rendering before the game shows
+        :param renderer: Name of the renderer backend (see renderers.RENDERERS)
+        :param telemetry: Log to append telemetry records to (see telemetry.py), nothing is logged if not given
+        :param frameBudget: Milliseconds of work per frame, enables the frame governor (see governor.py)
+        """
+        self.renderer = RENDERERS[renderer]()  # setup screen
+        self.playback = None
+        if replay:
+            self.playback = Playback(replay)
+            atexit.register(self.playback.close)
+            tickRate, pointsBubbles, bosses = self.playback.tickRate, self.playback.pointsBubbles, self.playback.bosses
+        self.replaying = bool(replay)  # The current game comes from the recording, its score isn't the player's
+        self.tickRate = tickRate
+        self.frameRate = frameRate
+        self.fastForward = fastForward
+        self.tickCount = 0  # Ticks since the game was created (retries included)
         self.border()
-        self.boundaryX = -322, 314  # x axis Boundary
-        self.boundaryY = -264, 264  # y axis Boundary
-        self.player1 = Player()
-        self.player1.changeSpeed(1, True)
-        self.pointsBubble = Player(xpos=random.randint(self.boundaryX[0], self.boundaryX[1]),
-                                   ypos=random.randint(self.boundaryY[0], self.boundaryY[1]), shape="circle", colour="red")
-        self.boss = Player(xpos=200, ypos=200, shape="circle", colour="black", hidden=True)
-        self.boss.changeSize(4, 4)
-        self.boss.setLives(7)
-        self.slowBubble = Player(xpos=1000, ypos=1000, shape="circle", colour="pink")
-        self.slowBubbleConfigured = False  # slow bubble visibility options
-        self.bossConfigured = False  # Avoid constant spawning
-        self.bossColourConfigured = False # Avoid constant colour spawning
-        self.bossDazzed = False  # Allows boss to be hit by player
-        self.points = 0
+        self.world = World(seed, pointsBubbles, bosses, tickLength=1 / tickRate)
+        self.sprites = {entity: RenderProxy(entity, self.renderer.sprite(entity))  # One per entity
+                        for entity in self.world.entities()}
+        self.inputs = controls.InputQueue()  # Inputs received since the last tick (filled from Tk and pynput)
+        self.listener = None
+        self.running = True  # Cleared to leave the game loop
+        self.ending = None  # Game over prompt ({"points", "qualifies", "name"}), the world doesn't tick meanwhile
+        self.hud = Hud(self.renderer.hudField)
+        self.scores = ScoreStore(background=True)  # Loaded once, added scores are written by a background thread
+        atexit.register(self.scores.flush)
+        self.recorder = None
+        if record:
+            self.recorder = Recorder(record, tickRate, pointsBubbles, bosses)
+            self.recorder.newGame(self.world.seed)
+            atexit.register(self.recorder.close)
+        self.profiler = None
+        if profile:
+            self.profiler = FrameProfiler()
+            self.profiler.instrumentWorld(self.world)
+            self.renderer.instrument(self.profiler)
+            self.updateHud = self.profiler.timed("hud", self.updateHud)
+            self.drawFrame = self.profiler.timed("render", self.drawFrame)
+            atexit.register(self.profiler.dump, profile)
+        self.telemetry = None
+        self.lastFrame = None  # perf_counter of the previous frame, for the telemetry frame times
+        if telemetry:
+            self.telemetry = TelemetryLog(telemetry)
+            atexit.register(self.telemetry.close)
+            self.logGameStart()
+        self.governor = None
+        if frameBudget:
+            self.governor = FrameGovernor(frameBudget, self.qualityChanged)
 
     def border(self):
         """
         Sets up the border/boundary lines
         """
-        myborder = turtle.Turtle()  # Creates new character
-        myborder.penup()
-        myborder.speed(5)
-        myborder.setposition(-335, -275)  # Sets character position to -335 by -275
-        myborder.pendown()  # puts pendown and leaves a line marking in its trace
-        myborder.pensize(3)  # Sets trace thickness to 3
-        myborder.forward(660)
-        myborder.left(90)
-        myborder.forward(550)
-        myborder.left(90)
-        myborder.forward(660)
-        myborder.left(90)
-        myborder.forward(550)
-        myborder.hideturtle()  # hides character
+        self.renderer.border()
 
     def setPoints(self, points):
         """
         :param points: Amount of points
         Changes points to the specified amount
         """
-        time.sleep(0.5)
-        self.points = points
-        self.player1.changeSpeed(0.2 * points/10)
-        self.speedCap()
-
-    def boundaryCheck(self):
-        """
-        Responsible for boundary collision
-        Rotates player and removes a life if player hits the boundary
-        """
-        if self.player1.getPos('x') > 314 or self.player1.getPos('x') < -322:
-            self.player1.rotate()
-            self.player1.lives -= 1
-            self.eraseSpecificText("lives")
-            self.displayText(str(self.player1.lives), -303, -300)  # lives title
-        if self.player1.getPos('y') > 264 or self.player1.getPos('y') < -264:
-            self.player1.rotate()
-            self.player1.lives -= 1
-            self.eraseSpecificText("lives")
-            self.displayText(str(self.player1.lives), -303, -300)  # lives title
-
-    def stuckCheck(self):
-        """
-        Checks if player is stuck, and if it is stuck, moves player to a safe position
-        """
-        if self.player1.needsUnsticking:
-            self.player1.changePos(self.boundaryX[0]/2 + self.boundaryX[1]/2, self.boundaryY[0]/2 + self.boundaryY[1]/2)
-            self.eraseSpecificText("lives")
-            self.displayText(str(self.player1.lives), -303, -300)  # lives title
-            self.player1.needsUnsticking = False
-
-    def speedCap(self):
-        """
-        Speed boundary which doesn't let the player exceed MAXSPEED (7.4) or fall under MINSPEED (1)
-        """
-        if round(self.player1.charSpeed, 2) >= self.player1.MAXSPEED:
-            self.player1.changeSpeed(self.player1.MAXSPEED, True)
-        if round(self.player1.charSpeed, 2) <= self.player1.MINSPEED:
-            self.player1.changeSpeed(self.player1.MINSPEED, True)
+        self.world.setPoints(points)
 
     def livesValidation(self):
         """
-        Prompts the user with a messageBox when lives hit 0
-            :messageBox options:
-                retry: Restarts the game
-                abort: Exits the game
-                ignore: Allows configuration options to be made (Keys:
+        Shows the game over prompt in the window when the world reports game over (lives hit 0), frames and input
+        carry on while the world waits for one of the options. A score that makes the leaderboard is given a
+        name first, typed straight into the window.
+            :prompt options:
+                ENTER retry: Saves the score and restarts the game (in place, see reset)
+                ESC abort: Saves the score and exits the game
+                TAB ignore: Allows configuration options to be made (Keys:
                                                                      "U" - [Places player in a safe position,
                                                                             Sets lives to 3,
                                                                             Disables movement]
@@ -280,312 +120,325 @@ class Game:
                        unfair:exception is in reference with an unfair ending, such as a glitch occurrence,
                         or something in relation of that nature
         """
-
-        if self.player1.lives <= 0:
-            self.player1.disableMovement()
-            self.player1.changePos(2000, 2000)
-            endingNoticeResponse=(messagebox.showinfo("Game Over", "You have ended with " + str(self.points) + " points",
-                                  type="abortretryignore"))
-            if endingNoticeResponse == "retry":
-                self.sendHighScore()
-                self.setup.clearscreen()
-                import run  # Used for replay button
-                x = run.runGame()
-                #x = run
-            elif endingNoticeResponse == "abort":
-                self.setup.bye()
-                self.sendHighScore()
-            elif endingNoticeResponse == "ignore":
-                self.player1.lives = 10000
-
-    def displayText(self, text, x, y, colour="black"):
-        """
-        :param text: Text to write
-        :param x: x axis to place text
-        :param y: y axis to place text
-        :param colour: Text colour
-        Write text on screen
-        """
-        Text = turtle.Turtle()
-        Text.penup()
-        Text.hideturtle()
-        Text.setposition(x, y)
-        if colour != "black":
-            Text.color(colour)
-        Text.write(text)
-
-    def eraseText(self, x, y, eraseAmount=15):
-        """
-        :param x: Location x axis of text to erase
-        :param y: Location y axis of text to erase
-        :param eraseAmount: Length in pixels of how much text to erase
-        Erase text
-        """
-        turtle.hideturtle()
-        turtle.penup()
-        turtle.setpos(x, y)
-        turtle.pendown()
-        turtle.speed(10)
-        turtle.color(turtle.bgcolor())
-        turtle.pensize(25)
-        turtle.begin_fill()
-        turtle.fd(eraseAmount)
-
-    def eraseSpecificText(self, title):
-        """
-        Erase text values easily based on their title
-        :param title: Which text value to erase (points, lives, speed, slowbubble)
-        """
-        if title == "points":
-            self.eraseText(-293, 293, 20)  # erase points
-        elif title == "lives":
-            self.eraseText(-295, -298, 20)  # erase lives
-        elif title == "speed":
-            self.eraseText(34, 293, 20)  # erase speed
-        elif title == "slowbubble":
-            self.eraseText(340, -297, 20)  # erase speed
-
-    def pointsBubbleCollision(self):
-        """
-        Sets up collision between pointsBubble and Player
-        """
-        if self.pointsBubble.getPos('x') - 15 <= self.player1.getPos('x') <= self.pointsBubble.getPos('x') + 15\
-                and self.pointsBubble.getPos('y') - 15 <= self.player1.getPos('y') <= self.pointsBubble.getPos('y') + 15:
-            self.pointsBubble.changePos(random.randint(self.boundaryX[0], self.boundaryX[1]),
-                                        random.randint(self.boundaryY[0], self.boundaryY[1]))
-            self.points += 10
-            self.player1.changeSpeed(0.2)
-            self.eraseSpecificText("points")
-
-            if self.player1.lives < 3:  # Lives reset to 3 when you hit pointsBubble
-                self.player1.lives = 3
-                self.eraseSpecificText("lives")
-                self.displayText(str(self.player1.lives), -303, -300)  # lives title
-
-            if round(self.player1.charSpeed, 2) <= self.player1.MAXSPEED:  # If player at max speed, text stays same
-                self.eraseSpecificText("speed")
-            self.displayText(self.points, -290, 290)
-            if round(self.player1.charSpeed, 2) <= self.player1.MAXSPEED:  # If player at max speed, text stays same
-                self.displayText("%.1f" % self.player1.charSpeed, 30, 290)
-
-    def bossSpawn(self):
-        """
-        Makes boss visible when points hit 100, and changes colours between black (not dazzed) and gold (dazzed)
-        """
-        if self.points == 100:
-            if not self.bossConfigured:
-                self.boss.showTurtle()
-        if self.points >= 100:
-            if self.bossDazzed:
-                if not self.bossColourConfigured:
-                    self.boss.changeColour("Gold")
-                    self.bossColourConfigured = True
-            else:
-                if not self.bossColourConfigured:
-                    self.boss.changeColour("Black")
-                    self.bossColourConfigured = True
-            self.bossConfigured = True
-            self.bossState()
-            self.bossCollision()
-
-    def bossCollision(self):
-        """
-        Sets up collision between player and boss and defines the rules of boss
-        """
-        if self.boss.getPos('x') - 40 <= self.pointsBubble.getPos('x') <= self.boss.getPos('x') + 40 \
-                and self.boss.getPos('y') - 40 <= self.pointsBubble.getPos('y') <= self.boss.getPos('y') + 40:  # if points bubble collides with boss
-            self.pointsBubble.changePos(random.randint(self.boundaryX[0], self.boundaryX[1]),
-                                        random.randint(self.boundaryY[0], self.boundaryY[1]))
-
-        if self.boss.getPos('x') - 40 <= self.player1.getPos('x') <= self.boss.getPos('x') + 40 \
-                and self.boss.getPos('y') - 40 <= self.player1.getPos('y') <= self.boss.getPos('y') + 40:
-            if self.bossDazzed:
-                self.boss.lives -= 1
-                self.boss.chainMove()
-                time.sleep(0.5)
-                self.player1.changePos(self.boundaryX[0] / 2 + self.boundaryX[1] / 2,
-                                       self.boundaryY[0] / 2 + self.boundaryY[1] / 2)
-                self.bossColourConfigured = False
-                if self.boss.lives >= 1:
-                    self.player1.changeSpeed(-0.8)
-                    self.points += 25
-                else:
-                    self.player1.changeSpeed(-1.6)
-                    self.points += 250
-                    self.boss.changePos(4000, 4000)
-                self.eraseSpecificText("points")
-                self.eraseSpecificText("speed")
-                self.displayText(self.points, -290, 290)
-                self.displayText("%.1f" % self.player1.charSpeed, 30, 290)
-                self.bossDazzed = False
-            else:
-                self.player1.lives -= 5
-
-    def bossState(self):
-        """
-        Changes boss dazzed state at the appropriate point range
-        """
-        if self.points == 150:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points == 205:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points == 300:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points == 375:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points == 450:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points == 555:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points == 620:
-            self.bossDazzed = True
-            self.bossColourConfigured = False
-        elif self.points > 620 and self.boss.lives > 1:  # If points were gathered without attacking the boss in dazzed state
-            if self.points % 50 == 0:
-                self.bossDazzed = True
-                self.bossColourConfigured = False
-
-    def slowBubbleSpawn(self):
-        """
-        Spawns the slow bubble every x amount of points and handles the collision
-        """
-        if self.points >= 560:
-            if self.points % 80 == 0 and not self.slowBubbleConfigured:
-                self.slowBubble.needsShowing = True
-                self.slowBubbleConfigured = True
-            if self.slowBubble.getPos('x') - 15 <= self.player1.getPos('x') <= self.slowBubble.getPos('x') + 15 \
-                    and self.slowBubble.getPos('y') - 15 <= self.player1.getPos('y') <= self.slowBubble.getPos(
-                'y') + 15:
-                self.player1.slowBubbles += 1
-                self.slowBubble.changePos(1000, 1000)
-                self.points += 10
-                self.eraseSpecificText("points")
-                self.eraseSpecificText("slowbubble")
-                self.displayText(self.points, -290, 290)
-                self.displayText(str(self.player1.slowBubbles), 335, -300)  # slow bubbles title
-                self.slowBubbleConfigured = False
-
-    def slowBubbleVisibility(self):
-        """
-        Makes the slow bubble visible
-        """
-        if self.slowBubble.needsShowing:
-            self.slowBubble.changePos(random.randint(self.boundaryX[0], self.boundaryX[1]),
-                                      random.randint(self.boundaryY[0], self.boundaryY[1]))
-            self.slowBubble.needsShowing = False
-
-    def forceDisplayUpdate(self):
-        """
-        Forces display to update
-        """
-        if self.player1.dispNeedsUpdating:
-            self.eraseSpecificText("speed")
-            self.eraseSpecificText("slowbubble")
-            self.displayText("%.1f" % self.player1.charSpeed, 30, 290)
-            self.displayText(str(self.player1.slowBubbles), 335, -300)  # slow bubbles title
-            self.player1.dispNeedsUpdating = False
-
-    def sendHighScore(self):
-        """
-        Sends the highscore data to xml file
-        """
-        if self.points > self.getHighScore()[1]:
-            name = input("ENTER YOUR NAME: ")
-            root = ET.Element("highscore")
-
-            ET.SubElement(root, "name", text=name)
-            ET.SubElement(root, "score", text=str(self.points))
-
-            tree = ET.ElementTree(root)
-            tree.write("score.xml")
+        points = self.world.points
+        self.ending = {"points": points, "qualifies": not self.replaying and self.scores.qualifies(points), "name": ""}
+        self.showEnding()
+
+    def endingKey(self, key, char):
+        """
+        :param key: Tk name of the key pressed
+        :param char: Character it typed
+        Handles the keys of the game over prompt (nothing happens while no game is over)
+        """
+        ending = self.ending
+        if not ending:
+            return
+        if key == "Return":  # retry
+            self.endGame(ending["name"])
+            self.replaying = False  # The recording is over, the new game is played from the keyboard
+            self.reset()
+        elif key == "Escape":  # abort
+            self.endGame(ending["name"])
+            self.ending = None
+            self.running = False
+        elif key == "Tab":  # ignore
+            self.ending = None
+            self.inputs.drain()
+            self.world.continueGame()
+            if self.recorder:
+                self.recorder.continueGame()
+        elif not ending["qualifies"]:
+            return
+        elif key == "BackSpace":
+            ending["name"] = ending["name"][:-1]
+        elif char and char.isprintable() and len(ending["name"]) < NAMELENGTH:
+            ending["name"] += char
+        self.showEnding()
+
+    def showEnding(self):
+        """
+        Writes (or clears, once no game is over) the game over prompt
+        """
+        ending = self.ending
+        if not ending:
+            for name in ("ending", "endingName", "endingOptions"):
+                self.hud.set(name, "")
+            return
+        self.hud.set("ending", "GAME OVER - You have ended with %d points" % ending["points"])
+        self.hud.set("endingName", "New high score! Your name: %s_" % ending["name"] if ending["qualifies"] else "")
+        self.hud.set("endingOptions", "ENTER retry    ESC quit    TAB carry on (U safe position, SPACE move)")
+
+    def updateHud(self):
+        """
+        Pushes the current values to the HUD, fields whose value didn't change are not redrawn
+        """
+        self.hud.set("points", self.world.points)
+        # Capped like the baseline's text: a points bubble can add speed after this tick's speed cap ran
+        self.hud.set("speed", min(self.world.player.charSpeed, self.world.rules.maxSpeed))
+        self.hud.set("lives", self.world.player.lives)
+        self.hud.set("slowbubble", self.world.slowBubbles)
+
+    def endGame(self, name):
+        """
+        :param name: Name typed on the game over prompt
+        Saves the score of the game that ended (not a replayed one) and logs its end (an ignored game over isn't
+        an end)
+        """
+        if self.ending["qualifies"]:
+            self.sendHighScore(name)
+        if self.telemetry:
+            self.telemetry.log("gameEnd", points=self.world.points, seconds=self.world.ticks * self.world.tickLength)
+            self.telemetry.handOver()  # A crash later on doesn't lose the game
+
+    def sendHighScore(self, name):
+        """
+        :param name: Name typed on the game over prompt
+        Adds the score to the leaderboard if it made it on, the xml file is written by the score writer thread
+        """
+        if self.scores.qualifies(self.world.points):
+            self.scores.add(name or "Player", self.world.points)
 
     def getHighScore(self):
         """
-        Gets the highscore, and the name of the user with the highscore
+        Gets the highscore, and the name of the user with the highscore (from memory, see ScoreStore)
         """
-        xmldoc = minidom.parse("score.xml")
-        highscoreName = xmldoc.getElementsByTagName('name')
-        highscoreValue = xmldoc.getElementsByTagName('score')
-        highscoreName = highscoreName[0].attributes['text'].value
-        highscoreValue = highscoreValue[0].attributes['text'].value
-        return highscoreName, int(highscoreValue)
+        return self.scores.getHighScore()
 
     def achievementColour(self):
         """
         Changes player colour based on high score
             Rewards:
-                300- Green
+                301- Green
                 700- Purple
                 1000- Orange
-                1500- Gold
+                2000- Gold
                 3000- Diamond
+        (one lookup in ACHIEVEMENTS, the high score is kept in memory by ScoreStore)
         """
-        if 300 < self.getHighScore()[1] < 700:
-            self.player1.changeColour("green")
-        elif 700 <= self.getHighScore()[1] < 1000:
-            self.player1.changeColour("purple")
-        elif 1000 <= self.getHighScore()[1] < 2000:
-            self.player1.changeColour(("orange"))
-        elif 1500 <= self.getHighScore()[1] < 3000:
-            self.player1.changeColour("gold")
-        elif self.getHighScore()[1] >= 3000:
-            turtle.colormode(255)
-            self.player1.changeColour((185, 242, 255))
+        reached = bisect.bisect_right(ACHIEVEMENTSCORES, self.getHighScore()[1])
+        if reached:
+            self.world.player.colour = ACHIEVEMENTS[reached - 1][1]
 
-    def gamePackage(self):
+    def infoDisplay(self):
+        """
+        Displays in game information on screen
         """
-        Includes all the important game functions in one function
+        self.hud.addField("points", -335, 290, "Points: ")  # Points title
+        self.hud.addField("highscore", 240, 290, "High Score: ", colour="gold")  # High-score Title
+        self.hud.addField("speed", -50, 290, "Current Speed: ", valueFormat="%.1f")  # speed title
+        self.hud.addField("lives", -335, -300, "Lives: ")  # lives title
+        self.hud.addField("slowbubble", 260, -300, "Slow Bubbles: ")  # slow bubbles title
+        self.hud.addField("ending", -150, 40, colour="red")  # game over prompt
+        self.hud.addField("endingName", -150, 10)
+        self.hud.addField("endingOptions", -150, -20, colour="grey")
+        self.showHighScore()
+        if self.profiler:
+            self.hud.addField("profile", -200, -300, colour="grey")  # profiler overlay
+        if self.governor:
+            self.hud.addField("quality", -200, -315, colour="grey")  # frame governor status
+        self.updateHud()
+
+    def showHighScore(self):
+        """
+        Updates the high score title (only redrawn if it changed)
+        """
+        highScoreName, highScore = self.getHighScore()
+        self.hud.set("highscore", str(highScoreName) + ": " + str(highScore))
+
+    def reset(self, seed=None):
+        """
+        :param seed: Seed of the new game (random if not given)
+        Starts a new game on the existing world, sprites, HUD and keyboard listener (used by retry)
+        """
+        self.world.reset(seed)
+        if self.recorder:
+            self.recorder.newGame(self.world.seed)
+        if self.telemetry:
+            self.logGameStart()
+        self.inputs.drain()  # Keys pressed during the game over prompt don't carry over
+        self.ending = None
+        self.showEnding()
+        self.achievementColour()
+        self.showHighScore()  # Drawn by the next frame (reset runs from Tk key callbacks, inside renderer.update)
+
+    def tick(self):
+        """
+        Advances the game by one simulation step
+        """
+        inputs = self.inputs.drain()
+        if self.playback and not self.playback.finished:  # The recording replaces the keyboard until it runs out
+            seed, continued, inputs = self.playback.take(self.tickCount)
+            if seed is not None:
+                self.reset(seed)
+            if continued:
+                self.world.continueGame()
+            if self.playback.finished:
+                self.playback.close()
+        if self.recorder:
+            self.recorder.inputs(inputs)
+        events = self.world.step(inputs)
+        self.tickCount += 1
+        if self.recorder:
+            self.recorder.advance()
+        if self.telemetry:
+            self.logEvents(events)
+        for event in events:
+            if event == world.GAMEOVER and not (self.playback and not self.playback.finished):
+                self.livesValidation()  # While the recording runs the game follows its recorded choice
+
+    def logGameStart(self):
+        state = self.world
+        self.telemetry.log("gameStart", seed=state.seed, tickRate=self.tickRate,
+                           pointsBubbles=len(state.pointsBubbles), bosses=len(state.bosses))
+
+    def logEvents(self, events):
+        """
+        :param events: Events of the tick that just ran
+        Logs them to telemetry, plus the points every POINTSINTERVAL seconds of game time
+        """
+        state = self.world
+        telemetry = self.telemetry
+        seconds = state.ticks * state.tickLength
+        if state.ticks % (POINTSINTERVAL * self.tickRate) == 0:
+            telemetry.log("points", points=state.points, seconds=seconds)
+        for event in events:
+            if event == world.BOSSHIT:
+                telemetry.log("bossHit", points=state.points, bossLives=state.lastHitBoss.lives,
+                              killed=state.lastHitBoss.lives < 1, seconds=seconds)
+            elif event == world.SLOWBUBBLEUSED:
+                telemetry.log("slowBubbleUsed", speed=state.player.charSpeed, seconds=seconds)
+            elif event == world.LIFELOST:
+                telemetry.log("lifeLost", lives=state.player.lives, points=state.points, seconds=seconds)
+
+    def renderFrame(self):
+        """
+        Draws everything that changed since the last frame in one screen update (also processes key events)
+        """
+        if self.profiler and self.profiler.frames % OVERLAYINTERVAL == 0:
+            self.hud.set("profile", self.profiler.overlayText())
+        if self.telemetry:
+            now = time.perf_counter()
+            if self.lastFrame is not None:
+                self.telemetry.frame((now - self.lastFrame) * 1000)
+            self.lastFrame = now
+        if not self.governor or self.governor.refreshHud():
+            self.updateHud()
+        self.drawFrame()
+
+    def drawFrame(self):
+        """
+        Mirrors the world onto the sprites and redraws the screen
+        """
+        for sprite in self.sprites.values():
+            sprite.mirror()
+        self.renderer.update()
+
+    def qualityChanged(self, status):
+        """
+        :param status: FrameGovernor status
+        Status hook of the frame governor: applies the shape detail and reports what is shed
+        """
+        for proxy in self.sprites.values():
+            proxy.sprite.detail(self.governor.lowDetail)
+        self.hud.set("quality", "shed: " + ", ".join(status["shed"]) if status["shed"] else "")
+        if self.telemetry:
+            self.telemetry.log("quality", **status)
+
+    def drawCalls(self):
+        """
+        Sprite draw calls sent to the renderer and skipped (unchanged or hidden) so far
+        """
+        return drawCalls(self.sprites.values())
+
+    def prepare(self):
+        """
+        Draws the HUD and the first frame (everything start does before entering the loop, without input threads)
         """
-        self.setup.listen()
-        self.setup.onkey(self.player1.turnLeft, "Left")
-        self.setup.onkey(self.player1.turnRight, "Right")
-        self.boundaryCheck()
-        self.stuckCheck()
-        self.speedCap()
-        self.livesValidation()
+        self.infoDisplay()
+        self.achievementColour()
+        self.renderFrame()
 
-    def extrasPackage(self):
+    def firstFrame(self):
         """
-        Includes game features and less important game functions in one function
+        Binds the arrow keys and shows the first frame, the game is interactive from here on
         """
-        self.slowBubbleSpawn()
-        self.pointsBubbleCollision()
-        self.slowBubbleVisibility()
-        self.bossSpawn()
-        self.forceDisplayUpdate()
+        controls.bindKeys(self.renderer, self.inputs)  # Once, the bindings stay for the whole game
+        self.renderer.onkeypress(self.endingKey)  # The game over prompt is typed into the window
+        #self.setPoints(1320)  # MAX SPEED POINTS 320
+        #self.world.slowBubbles = 12
+        self.prepare()
+        for tick in range(self.fastForward):  # Headless catch up through the replay, drawn once at the end
+            self.tick()
+        self.renderFrame()
 
-    def infoDisplay(self):
+    def startKeyboardListener(self):
         """
-        Displays in game information on screen
+        Starts the pynput listener (ESC, SPACE, U and SHIFT), after the first frame so its import doesn't delay it.
+        The game carries on without those keys if pynput is missing or its backend fails.
         """
-        self.displayText("Points: " + str(self.points), -335, 290)  # Points title
-        self.displayText("High Score: " + str(self.getHighScore()[0]) + ": " + str(self.getHighScore()[1]), 240, 290, colour="gold")  # High-score Title
-        self.displayText("Current Speed: " + str(self.player1.charSpeed), -50, 290)  # speed title
-        self.displayText("Lives: " + str(self.player1.lives), -335, -300)  # lives title
-        self.displayText("Slow Bubbles: " + str(self.player1.slowBubbles), 260, -300)  # slow bubbles title
+        try:
+            self.listener = controls.startKeyboardListener(self.inputs)
+        except Exception as error:
+            print("Keyboard listener unavailable, ESC, SPACE, U and SHIFT won't work: %r" % error)
 
     def start(self):
         """
-        Initiate the game
-        """
-        kbThread = threading.Thread(target=lambda: self.player1.keyboardThread(0))
-        kbThread.daemon = True
-        kbThread.start()
-        kbThread.join()
-
-        #self.setPoints(1320)  # MAX SPEED POINTS 320
-        #self.player1.slowBubbles = 12
-        self.infoDisplay()
-        self.achievementColour()
-
-        while 1:
-            if self.player1.playerMove:
-                self.player1.playerMoving()
-            self.gamePackage()
-            self.extrasPackage()
+        Initiate the game (runs the asyncio runtime until the game is closed)
+        """
+        asyncio.run(self.run())
+
+    async def run(self):
+        """
+        The game loop as a coroutine: fixed step ticks and frames on one clock, waiting with the event loop in
+        between (Tk events are pumped by every frame, input arrives through an AsyncInputQueue and slow work runs
+        on executors)
+        """
+        loop = asyncio.get_running_loop()
+        self.inputs = controls.AsyncInputQueue(loop)
+        self.firstFrame()
+        listenerStarted = loop.run_in_executor(None, self.startKeyboardListener)  # Its import is slow
+
+        tickLength = 1 / self.tickRate
+        frameLength = 1 / self.frameRate
+        previous = time.perf_counter()
+        nextFrame = previous + frameLength
+        lag = 0
+        work = 0  # Seconds of work since the previous frame slot, for the governor
+        profiler = self.profiler
+        governor = self.governor
+
+        while self.running:
+            if profiler:
+                profiler.beginFrame()
+            now = time.perf_counter()
+            lag += min(now - previous, MAXFRAMETIME)  # Don't try to catch up on time spent blocked
+            previous = now
+            while lag >= tickLength and self.running:  # Simulation always advances in fixed steps
+                if self.ending:
+                    lag = 0  # The ended game waits on its game over prompt
+                    break
+                self.tick()
+                lag -= tickLength
+            if not self.running:
+                break
+            if now >= nextFrame:
+                if governor:
+                    governor.frame(work * 1000)
+                    work = 0
+                if not governor or governor.render():  # A skipped frame still takes its slot
+                    self.renderFrame()
+                    if profiler:
+                        profiler.endFrame()
+                nextFrame += frameLength
+                if nextFrame < now:  # Drop frames instead of bursting to catch up
+                    nextFrame = now + frameLength
+            finished = time.perf_counter()
+            if governor:
+                work += finished - now
+            idle = min(tickLength - lag, nextFrame - finished)
+            if idle > 0 and profiler:
+                profiler.pauseFrame()
+            await asyncio.sleep(max(idle, 0))  # Lets executor results and other callbacks in even when late
+        await listenerStarted
+        await loop.run_in_executor(None, self.scores.flush)  # Abort: the score is written before the window closes
+        self.renderer.bye()
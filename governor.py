@@ -0,0 +1,89 @@
+"""
+Adaptive frame budget: measures every frame against a budget and sheds optional work while the machine can't keep
+up, restoring it once there is headroom again
+
+Work is shed one step at a time, in this order:
+    hudThrottled    the HUD is only refreshed every HUDINTERVAL rendered frames
+    framesSkipped   every other frame is skipped, the simulation keeps ticking at its own rate
+    lowDetail       sprites are drawn with simpler shapes
+"""
+SHEDDING = ("hudThrottled", "framesSkipped", "lowDetail")
+HUDINTERVAL = 6  # Rendered frames between HUD refreshes while throttled
+FRAMEINTERVAL = 2  # Frame slots per rendered frame while skipping
+SMOOTHING = 0.05  # Weight of the newest frame in the moving average
+SHEDAT = 0.9  # Fraction of the budget above which the next step is shed
+RESTOREAT = 0.45  # Fraction of the budget below which the last step is restored (below half, frame skipping halves it)
+SHEDFRAMES = 30  # Frames at a level before another step is shed
+RESTOREFRAMES = 180  # Frames at a level before a step is restored, slower so the quality doesn't flicker
+
+
+class FrameGovernor:
+    """
+    Keeps a moving average of the work per frame slot (ticks and rendering, not the idle wait) and picks how much
+    is shed from it
+    """
+    def __init__(self, budget, onChange=None):
+        """
+        :param budget: Milliseconds of work allowed per frame (the frame length leaves no room for anything else)
+        :param onChange: Function called with the status (see status) every time the level changes
+        """
+        self.budget = budget
+        self.onChange = onChange
+        self.level = 0  # Amount of SHEDDING steps in effect
+        self.average = None  # Milliseconds
+        self.framesAtLevel = 0
+        self.slots = 0  # Frame slots seen, rendered or not
+        self.rendered = 0
+
+    def frame(self, milliseconds):
+        """
+        :param milliseconds: Work done since the previous frame slot
+        """
+        if self.average is None:
+            self.average = milliseconds
+        else:
+            self.average += (milliseconds - self.average) * SMOOTHING
+        self.framesAtLevel += 1
+        if self.average > self.budget * SHEDAT and self.level < len(SHEDDING) and self.framesAtLevel >= SHEDFRAMES:
+            self.setLevel(self.level + 1)
+        elif self.average < self.budget * RESTOREAT and self.level and self.framesAtLevel >= RESTOREFRAMES:
+            self.setLevel(self.level - 1)
+
+    def setLevel(self, level):
+        self.level = level
+        self.framesAtLevel = 0
+        if self.onChange:
+            self.onChange(self.status())
+
+    def render(self):
+        """
+        True if the frame slot that is due should be rendered
+        """
+        self.slots += 1
+        return not self.framesSkipped or self.slots % FRAMEINTERVAL == 0
+
+    def refreshHud(self):
+        """
+        True if the frame being rendered should refresh the HUD
+        """
+        self.rendered += 1
+        return not self.hudThrottled or self.rendered % HUDINTERVAL == 0
+
+    @property
+    def hudThrottled(self):
+        return self.level >= 1
+
+    @property
+    def framesSkipped(self):
+        return self.level >= 2
+
+    @property
+    def lowDetail(self):
+        return self.level >= 3
+
+    def status(self):
+        """
+        Level, steps shed (see SHEDDING), average work per frame slot and budget (milliseconds)
+        """
+        return {"level": self.level, "shed": list(SHEDDING[:self.level]), "frameMs": self.average,
+                "budgetMs": self.budget}
@@ -0,0 +1,70 @@
+class HudField:
+    """
+    A single piece of on screen text which owns one (hidden) turtle and rewrites itself in place
+    """
+    def __init__(self, x, y, label="", colour="black", valueFormat="%s"):
+        """
+        :param x: x axis to place text
+        :param y: y axis to place text
+        :param label: Text written in front of the value (e.g. "Points: ")
+        :param colour: Text colour
+        :param valueFormat: % format used to turn the value into text
+        """
+        import turtle  # Only the turtle backend needs it (see renderers.py)
+        self.writer = turtle.Turtle()
+        self.writer.hideturtle()
+        self.writer.penup()
+        self.writer.setundobuffer(None)  # Nothing written here is ever undone
+        self.writer.setposition(x, y)
+        self.writer.color(colour)
+        self.label = label
+        self.valueFormat = valueFormat
+        self.value = None  # Last value written, None until first write
+        self.redraws = 0
+
+    def set(self, value):
+        """
+        :param value: Value to display
+        Rewrites the text, but only if the value actually changed
+        """
+        if value == self.value:
+            return False
+        self.value = value
+        self.writer.clear()  # Deletes the previous canvas text item instead of painting over it
+        self.writer.write(self.label + self.valueFormat % (value,))
+        self.redraws += 1
+        return True
+
+
+class Hud:
+    """
+    Collection of named HUD fields (points, lives, speed, slow bubbles, high score)
+    """
+    def __init__(self, fieldType=HudField):
+        """
+        :param fieldType: Creates a field from (x, y, label, colour, valueFormat), HudField draws with turtle
+        """
+        self.fieldType = fieldType
+        self.fields = {}
+
+    def addField(self, name, x, y, label="", colour="black", valueFormat="%s"):
+        """
+        Creates a field, or returns the existing one with that name
+        """
+        if name not in self.fields:
+            self.fields[name] = self.fieldType(x, y, label, colour, valueFormat)
+        return self.fields[name]
+
+    def set(self, name, value):
+        """
+        :param name: Field name
+        :param value: Value to display
+        Updates a field, returns True if it had to be redrawn
+        """
+        return self.fields[name].set(value)
+
+    def redraws(self):
+        """
+        Total amount of text redraws done by every field
+        """
+        return sum(field.redraws for field in self.fields.values())
@@ -0,0 +1,136 @@
+import json
+import math
+import time
+from collections import deque
+
+SUBSYSTEMS = "movement", "boundary", "collisions", "boss", "hud", "render"
+WINDOW = 600  # Frames kept for the rolling percentiles
+# TurtleScreen methods which end up as Tk canvas calls, counted as turtle commands
+SCREENCOMMANDS = ("_createpoly", "_drawpoly", "_createline", "_drawline", "_delete", "_write", "_createimage",
+                  "_drawimage", "_bgcolor", "_pointlist")
+
+
+def percentile(ordered, fraction):
+    """
+    :param ordered: Sorted list of samples
+    :param fraction: 0 to 1 (0.95 for p95)
+    Nearest rank percentile, 0 when there are no samples
+    """
+    if not ordered:
+        return 0
+    rank = math.ceil(round(fraction * len(ordered), 9))  # Rounded first so 0.07 * 100 is rank 7, not 8
+    index = min(len(ordered) - 1, max(0, rank - 1))
+    return ordered[index]
+
+
+class FrameProfiler:
+    """
+    Opt-in per frame instrumentation: frame time, time per subsystem and turtle commands per frame
+
+    Nothing is timed until instrumentWorld/instrumentScreen/timed are used, so a game without a profiler
+    pays nothing for it.
+    """
+    def __init__(self, window=WINDOW):
+        """
+        :param window: Amount of frames the rolling percentiles are computed over
+        """
+        self.samples = {name: deque(maxlen=window) for name in ("frame", "commands") + SUBSYSTEMS}
+        self.current = dict.fromkeys(self.samples, 0)  # Totals of the frame in progress
+        self.frames = 0
+        self.frameStart = None
+
+    def timed(self, name, function):
+        """
+        :param name: Subsystem the time is added to
+        :param function: Function to time
+        Wraps function so each call adds its duration (milliseconds) to the current frame
+        """
+        current = self.current
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current[name] += (clock() - start) * 1000
+        return wrapper
+
+    def instrumentWorld(self, world):
+        """
+        Times the phases of World.step (movement, boundary, collisions, boss)
+        """
+        world.phases = tuple((name, self.timed(name, phase)) for name, phase in world.phases)
+
+    def instrumentScreen(self, screen, commands=SCREENCOMMANDS):
+        """
+        :param screen: turtle screen (or canvas of the canvas renderer)
+        :param commands: Names of its methods that issue canvas commands
+        Counts the canvas commands issued through the screen
+        """
+        current = self.current
+
+        def counted(function):
+            def wrapper(*args, **kwargs):
+                current["commands"] += 1
+                return function(*args, **kwargs)
+            return wrapper
+        for name in commands:
+            setattr(screen, name, counted(getattr(screen, name)))
+
+    def beginFrame(self):
+        """
+        Marks the start of the work done for a frame (the idle sleep is not part of the frame time)
+        """
+        if self.frameStart is None:
+            self.frameStart = time.perf_counter()
+
+    def endFrame(self):
+        """
+        Stores the samples of the frame that was just rendered and starts a new one
+        """
+        if self.frameStart is not None:
+            self.current["frame"] += (time.perf_counter() - self.frameStart) * 1000
+        self.frameStart = None
+        for name, value in self.current.items():
+            self.samples[name].append(value)
+            self.current[name] = 0
+        self.frames += 1
+
+    def pauseFrame(self):
+        """
+        Adds the time since beginFrame to the frame in progress (called before sleeping)
+        """
+        if self.frameStart is not None:
+            self.current["frame"] += (time.perf_counter() - self.frameStart) * 1000
+            self.frameStart = None
+
+    def percentiles(self, name):
+        """
+        :param name: "frame", "commands" or one of SUBSYSTEMS
+        p50, p95 and p99 of the rolling window
+        """
+        ordered = sorted(self.samples[name])
+        return {"p50": percentile(ordered, 0.5), "p95": percentile(ordered, 0.95), "p99": percentile(ordered, 0.99)}
+
+    def summary(self):
+        """
+        Machine readable snapshot of every rolling percentile (times in milliseconds)
+        """
+        return {"frames": self.frames, "window": len(self.samples["frame"]),
+                "percentiles": {name: self.percentiles(name) for name in self.samples}}
+
+    def overlayText(self):
+        """
+        Short one line summary for the on screen overlay
+        """
+        frame = self.percentiles("frame")
+        return "frame ms p50 %.1f p95 %.1f p99 %.1f | cmds p50 %d" % (
+            frame["p50"], frame["p95"], frame["p99"], self.percentiles("commands")["p50"])
+
+    def dump(self, path):
+        """
+        :param path: File to write the summary to as json
+        """
+        with open(path, "w") as dumpFile:
+            json.dump(self.summary(), dumpFile, indent=2)
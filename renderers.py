@@ -0,0 +1,357 @@
+"""
+Renderer backends, how Game puts the world on screen
+
+    turtle  one turtle per entity and HUD field (default)
+    canvas  raw tkinter.Canvas items, moved with coords/move and redrawn once per frame by Tk's idle update
+
+Both give Game the same interface: sprite(entity), hudField(...), border(), update(), onkey(...)/listen() (so
+controls.bindKeys works on either), onkeypress(...), instrument(profiler), turtles(), close() and bye(), plus
+their canvas.
+Sprites only know how to draw (place, turn, paint, resize, show, detail), RenderProxy decides what needs drawing.
+"""
+import functools
+import math
+import tkinter
+
+from hud import HudField
+
+WIDTH = 760  # Canvas backend window size (the arena and the HUD fit with a margin)
+HEIGHT = 680
+FONT = ("Arial", 8, "normal")  # Same as turtle.write
+TRIANGLE = ((10, -5.77), (0, 11.55), (-10, -5.77))  # turtle's "triangle" shape, pointing along +y
+CIRCLERADIUS = 10  # turtle's "circle" shape at size 1
+LOWCIRCLE = tuple((round(CIRCLERADIUS * math.cos(math.pi * corner / 4), 2),
+                   round(CIRCLERADIUS * math.sin(math.pi * corner / 4), 2)) for corner in range(8))  # Octagon
+LOWDETAIL = {"circle": "lowcircle"}  # turtle shapes drawn instead while the frame governor lowers detail
+CANVASCOMMANDS = ("coords", "move", "itemconfigure", "create_polygon", "create_oval", "create_text",
+                  "create_rectangle", "delete")
+
+
+class RenderProxy:
+    """
+    Mirrors a world.Entity onto a backend sprite once per frame, remembering what it last sent so only real
+    differences reach the backend. A hidden entity only sends its visibility, the rest follows when it shows again.
+    """
+    def __init__(self, entity, sprite):
+        """
+        :param entity: world.Entity to draw
+        :param sprite: Backend sprite drawing it (Player or CanvasSprite)
+        """
+        self.entity = entity
+        self.sprite = sprite
+        self.sent = {}  # Last value sent per attribute
+        self.issued = 0  # Draw calls sent to the backend
+        self.suppressed = 0  # Draw calls skipped because nothing changed (or the entity is hidden)
+        self.mirror()
+
+    def send(self, attribute, value, draw):
+        """
+        :param attribute: Name of the cached attribute
+        :param value: Its current value
+        :param draw: Backend function drawing it
+        """
+        if attribute in self.sent and self.sent[attribute] == value:
+            self.suppressed += 1
+            return
+        self.sent[attribute] = value
+        draw(value)
+        self.issued += 1
+
+    def mirror(self):
+        """
+        Sends the position, heading, colour, size and visibility that changed since the last frame
+        """
+        entity = self.entity
+        sprite = self.sprite
+        if entity.visible:  # Placed before it is shown, so it never flashes at its old position
+            self.send("position", (entity.x, entity.y), sprite.place)
+            self.send("heading", entity.heading, sprite.turn)
+            self.send("colour", entity.colour, sprite.paint)
+            self.send("size", entity.size, sprite.resize)
+        else:
+            self.suppressed += 4
+        self.send("visible", entity.visible, sprite.show)
+
+
+def drawCalls(proxies):
+    """
+    :param proxies: RenderProxy objects
+    Draw calls issued and suppressed by all of them
+    """
+    return {"issued": sum(proxy.issued for proxy in proxies),
+            "suppressed": sum(proxy.suppressed for proxy in proxies)}
+
+
+class Player:
+    """
+    Turtle that draws one character of the World (see RenderProxy)
+    """
+    def __init__(self, entity):
+        """
+        :param entity: world.Entity this turtle draws
+        """
+        import turtle  # Imported by the turtle backend only (it also loads tkinter's dialogs)
+        self.player = turtle.Turtle()
+        self.shape = entity.shape
+        self.player.shape(self.shape)
+        self.player.penup()  # Don't leave any traces when moving
+
+    def place(self, position):
+        self.player.setposition(position)
+
+    def turn(self, heading):
+        self.player.setheading(heading)
+
+    def paint(self, colour):
+        self.player.color(colour)
+
+    def resize(self, size):
+        self.player.turtlesize(size, size)
+
+    def show(self, visible):
+        if visible:
+            self.player.showturtle()
+        else:
+            self.player.hideturtle()
+
+    def detail(self, low):
+        self.player.shape(LOWDETAIL.get(self.shape, self.shape) if low else self.shape)
+
+
+class TurtleRenderer:
+    """
+    Draws with turtle, animation off so the screen is only redrawn by update
+    """
+    def __init__(self):
+        import turtle
+        self.screen = turtle.Screen()  # setup screen
+        self.screen.tracer(0)  # No animation, the screen is only redrawn by renderFrame
+        self.screen.bgcolor("white")  # screen colour
+        self.screen.colormode(255)  # Colours given as tuples are 0-255 (see Game.achievementColour)
+        self.screen.register_shape("lowcircle", LOWCIRCLE)
+        self.canvas = self.screen.getcanvas()
+        self.hudField = HudField
+
+    def sprite(self, entity):
+        return Player(entity)
+
+    def border(self):
+        """
+        Sets up the border/boundary lines, one static canvas item instead of a turtle walking the four sides
+        (turtle draws at scale 1 with the canvas y axis pointing down, so the item lands where the walk did)
+        """
+        drawBorder(self.canvas)
+
+    def update(self):
+        self.screen.update()
+
+    def onkey(self, fun, key):
+        self.screen.onkey(fun, key)
+
+    def listen(self):
+        self.screen.listen()
+
+    def onkeypress(self, fun):
+        bindKeyPress(self.canvas, fun)
+
+    def instrument(self, profiler):
+        profiler.instrumentScreen(self.screen)
+
+    def turtles(self):
+        return self.screen.turtles()
+
+    def close(self):
+        """
+        Clears everything drawn (the turtle screen can't be created twice, the next Game reuses it)
+        """
+        self.screen.clearscreen()
+
+    def bye(self):
+        self.screen.bye()
+
+
+def bindKeyPress(widget, fun):
+    """
+    :param widget: Any widget of the game window
+    :param fun: Function called with the key name and the character typed (may be empty) of every key pressed
+    """
+    widget.winfo_toplevel().bind("<KeyPress>", lambda event: fun(event.keysym, event.char), add="+")
+
+
+def drawBorder(canvas):
+    """
+    :param canvas: tkinter.Canvas with its origin in the middle
+    The 660 x 550 arena border, from (-335, -275), 3 wide
+    """
+    canvas.create_rectangle(-335, -275, 325, 275, width=3)
+
+
+def canvasColour(colour):
+    """
+    :param colour: Colour name or 0-255 (r, g, b) tuple
+    """
+    if isinstance(colour, tuple):
+        return "#%02x%02x%02x" % colour
+    return colour
+
+
+class CanvasSprite:
+    """
+    Canvas item that draws one character of the World (see RenderProxy)
+    """
+    def __init__(self, entity, canvas):
+        """
+        :param entity: world.Entity this item draws
+        :param canvas: tkinter.Canvas to draw on
+        """
+        self.canvas = canvas
+        self.triangle = entity.shape == "triangle"
+        if self.triangle:
+            self.item = canvas.create_polygon(0, 0, 0, 0, 0, 0)
+        else:
+            self.item = canvas.create_oval(-CIRCLERADIUS, -CIRCLERADIUS, CIRCLERADIUS, CIRCLERADIUS)
+        self.x, self.y, self.heading, self.size = 0, 0, 0, 1  # As drawn
+
+    def place(self, position):
+        x, y = position
+        if self.triangle:
+            self.x, self.y = x, y
+            self.redraw()
+        else:
+            self.canvas.move(self.item, x - self.x, self.y - y)
+            self.x, self.y = x, y
+
+    def turn(self, heading):
+        self.heading = heading
+        if self.triangle:
+            self.redraw()
+
+    def paint(self, colour):
+        colour = canvasColour(colour)
+        self.canvas.itemconfigure(self.item, fill=colour, outline=colour)
+
+    def resize(self, size):
+        self.size = size
+        self.redraw()
+
+    def show(self, visible):
+        self.canvas.itemconfigure(self.item, state="normal" if visible else "hidden")
+
+    def detail(self, low):
+        """
+        :param low: Fill only, without the outline pass
+        """
+        self.canvas.itemconfigure(self.item, width=0 if low else 1)
+
+    def redraw(self):
+        """
+        Sets the canvas coordinates of the item (the canvas y axis points down)
+        """
+        if not self.triangle:
+            radius = CIRCLERADIUS * self.size
+            self.canvas.coords(self.item, self.x - radius, -self.y - radius, self.x + radius, -self.y + radius)
+            return
+        angle = math.radians(self.heading)
+        cos, sin = math.cos(angle), math.sin(angle)
+        points = []
+        for side, ahead in TRIANGLE:
+            side *= self.size
+            ahead *= self.size
+            points.append(self.x + ahead * cos + side * sin)
+            points.append(-(self.y + ahead * sin - side * cos))
+        self.canvas.coords(self.item, *points)
+
+
+class CanvasText:
+    """
+    A single piece of on screen text, one canvas text item rewritten in place (same interface as HudField)
+    """
+    def __init__(self, canvas, x, y, label="", colour="black", valueFormat="%s"):
+        """
+        :param canvas: tkinter.Canvas to write on
+        :param x: x axis to place text
+        :param y: y axis to place text
+        :param label: Text written in front of the value (e.g. "Points: ")
+        :param colour: Text colour
+        :param valueFormat: % format used to turn the value into text
+        """
+        self.canvas = canvas
+        self.item = canvas.create_text(x, -y, anchor="sw", text="", fill=colour, font=FONT)
+        self.label = label
+        self.valueFormat = valueFormat
+        self.value = None  # Last value written, None until first write
+        self.redraws = 0
+
+    def set(self, value):
+        """
+        :param value: Value to display
+        Rewrites the text, but only if the value actually changed
+        """
+        if value == self.value:
+            return False
+        self.value = value
+        self.canvas.itemconfigure(self.item, text=self.label + self.valueFormat % (value,))
+        self.redraws += 1
+        return True
+
+
+class CanvasRenderer:
+    """
+    Draws with plain canvas items, bypassing turtle's per call bookkeeping. Item changes only mark the canvas
+    dirty, Tk redraws it once in the idle update of the frame.
+    """
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        """
+        :param width: Window width
+        :param height: Window height
+        """
+        self.root = tkinter.Tk()
+        self.root.title("Circle Collector")
+        self.canvas = tkinter.Canvas(self.root, width=width, height=height, background="white",
+                                     highlightthickness=0)
+        self.canvas.configure(scrollregion=(-width / 2, -height / 2, width / 2, height / 2))  # Origin in the middle
+        self.canvas.pack()
+        self.hudField = functools.partial(CanvasText, self.canvas)
+
+    def sprite(self, entity):
+        return CanvasSprite(entity, self.canvas)
+
+    def border(self):
+        """
+        Sets up the border/boundary lines
+        """
+        drawBorder(self.canvas)
+
+    def update(self):
+        """
+        Processes pending events and redraws the canvas once
+        """
+        self.root.update()
+
+    def onkey(self, fun, key):
+        """
+        :param fun: Function called without arguments
+        :param key: Tk key name, fun runs when it is released (like turtle's onkey)
+        """
+        self.root.bind("<KeyRelease-%s>" % key, lambda event: fun())
+
+    def listen(self):
+        self.canvas.focus_force()
+
+    def onkeypress(self, fun):
+        bindKeyPress(self.canvas, fun)
+
+    def instrument(self, profiler):
+        profiler.instrumentScreen(self.canvas, CANVASCOMMANDS)
+
+    def turtles(self):
+        return []
+
+    def close(self):
+        self.root.destroy()
+
+    def bye(self):
+        self.root.destroy()
+
+
+RENDERERS = {"turtle": TurtleRenderer, "canvas": CanvasRenderer}
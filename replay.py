@@ -0,0 +1,204 @@
+"""
+Input recording and deterministic playback
+
+A recording is a small header followed by an append-only stream of records. Each record is the amount of ticks
+since the previous record (varint) plus a one byte code, so an input costs 2-3 bytes and a tick without input
+costs nothing. The world is deterministic given its seed and the inputs of every tick, so a recording replays
+frame-exactly.
+
+    python replay.py session.rec        # fast-forwards every game of a recording headlessly and prints the results
+"""
+import argparse
+import json
+import struct
+
+import world
+from world import World
+
+MAGIC = b"CCRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHH")  # magic, version, tickRate, pointsBubbles, bosses
+SEED = struct.Struct("<Q")
+
+CODES = {name: code for code, name in enumerate(world.INPUTS)}
+NEWGAME = 0x40  # Followed by the 8 byte seed of the game (the first record and every retry)
+CONTINUE = 0x41  # The "ignore" option of the game over prompt
+
+
+def encodeVarint(value):
+    """
+    :param value: Non negative integer
+    LEB128 bytes of value (one byte below 128)
+    """
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+class Recorder:
+    """
+    Writes the seed of every game and the inputs of every tick to a recording
+    """
+    def __init__(self, path, tickRate, pointsBubbles=1, bosses=1):
+        """
+        :param path: Recording file (overwritten)
+        :param tickRate: Ticks per second of the recorded game
+        :param pointsBubbles: Amount of points bubbles of the recorded world
+        :param bosses: Amount of bosses of the recorded world
+        """
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, tickRate, pointsBubbles, bosses))
+        self.tick = 0  # Tick the next records belong to
+        self.lastTick = 0  # Tick of the previous record
+
+    def record(self, code, payload=b""):
+        """
+        :param code: Record code
+        :param payload: Extra bytes of the record
+        """
+        self.file.write(encodeVarint(self.tick - self.lastTick) + bytes((code,)) + payload)
+        self.lastTick = self.tick
+
+    def newGame(self, seed):
+        """
+        :param seed: Seed of the game starting on the current tick
+        """
+        self.record(NEWGAME, SEED.pack(seed))
+        self.file.flush()
+
+    def continueGame(self):
+        self.record(CONTINUE)
+
+    def inputs(self, names):
+        """
+        :param names: Inputs applied on the current tick
+        """
+        for name in names:
+            self.record(CODES[name])
+
+    def advance(self):
+        """
+        Moves on to the next tick
+        """
+        self.tick += 1
+
+    def close(self):
+        self.file.close()
+
+
+def readRecords(recordingFile):
+    """
+    :param recordingFile: Binary file positioned after the header
+    Yields (tick, code, payload) for every record, streaming
+    """
+    tick = 0
+    while True:
+        delta = 0
+        shift = 0
+        while True:
+            byte = recordingFile.read(1)
+            if not byte:
+                return  # End of the recording (a partly written record at the end is dropped)
+            delta |= (byte[0] & 0x7f) << shift
+            shift += 7
+            if not byte[0] & 0x80:
+                break
+        code = recordingFile.read(1)
+        if not code:
+            return
+        payload = b""
+        if code[0] == NEWGAME:
+            payload = recordingFile.read(SEED.size)
+            if len(payload) < SEED.size:
+                return
+        tick += delta
+        yield tick, code[0], payload
+
+
+class Playback:
+    """
+    Reads a recording back tick by tick
+    """
+    def __init__(self, path):
+        """
+        :param path: Recording file
+        """
+        self.file = open(path, "rb")
+        magic, version, self.tickRate, self.pointsBubbles, self.bosses = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a version %d recording" % (path, VERSION))
+        self.records = readRecords(self.file)
+        self.next = next(self.records, None)
+        self.finished = self.next is None
+
+    def take(self, tick):
+        """
+        :param tick: Tick about to be stepped
+        Returns (seed of a new game or None, continue game, inputs) recorded for that tick
+        """
+        seed = None
+        continued = False
+        inputs = []
+        while self.next is not None and self.next[0] <= tick:
+            recordTick, code, payload = self.next
+            if code == NEWGAME:
+                seed = SEED.unpack(payload)[0]
+            elif code == CONTINUE:
+                continued = True
+            else:
+                inputs.append(world.INPUTS[code])
+            self.next = next(self.records, None)
+        self.finished = self.next is None
+        return seed, continued, inputs
+
+    def close(self):
+        self.file.close()
+
+
+def replayHeadless(path, extraTicks=0):
+    """
+    :param path: Recording file
+    :param extraTicks: Ticks to keep stepping after the last record (the last game usually ran on without input)
+    Replays every game of a recording through World only, returns a summary of each game
+    """
+    playback = Playback(path)
+    state = World(pointsBubbles=playback.pointsBubbles, bosses=playback.bosses, tickLength=1 / playback.tickRate)
+    games = []
+    tick = 0
+    remaining = extraTicks
+    try:
+        while not playback.finished or remaining > 0:
+            if playback.finished:
+                remaining -= 1
+            seed, continued, inputs = playback.take(tick)
+            if seed is not None:
+                state.reset(seed)
+                games.append({"seed": seed, "startTick": tick})
+            if continued:
+                state.continueGame()
+            state.step(inputs)
+            if games:
+                games[-1].update(points=state.points, ticks=state.ticks, lives=state.player.lives,
+                                 gameOver=state.gameOver)
+            tick += 1
+    finally:
+        playback.close()
+    return games
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recording headlessly")
+    parser.add_argument("recording", help="recording made with run.py --record")
+    parser.add_argument("--extra-ticks", type=int, default=0, help="ticks to run after the last record")
+    args = parser.parse_args(argv)
+    print(json.dumps(replayHeadless(args.recording, args.extra_ticks), indent=2))
+
+
+if __name__ == "__main__":
+    main()
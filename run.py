@@ -1,6 +1,70 @@
-import game
 import time
-def runGame():
-    x = game.Game()
+STARTED = time.perf_counter()  # Before the game modules are imported, for --startup
+import argparse
+import json
+import sys
+import game
+
+MAXCOUNT = 65535  # Largest tick rate, bubble or boss count a recording header holds (see replay.HEADER)
+
+
+def count(text):
+    """
+    :param text: Command line value
+    argparse type for tick rates and entity counts: a whole number from 1 to MAXCOUNT
+    """
+    value = int(text)
+    if not 1 <= value <= MAXCOUNT:
+        raise argparse.ArgumentTypeError("must be from 1 to %d" % MAXCOUNT)
+    return value
+
+
+def runGame(**options):
+    x = game.Game(**options)
     x.start()
-runGame()
+
+
+def measureStartup(**options):
+    """
+    Cold start up to the first interactive frame (arrow keys bound, world and HUD drawn), then exits
+    Prints the time spent importing, creating the game and drawing the first frame (milliseconds)
+    """
+    imported = time.perf_counter()
+    x = game.Game(**options)
+    created = time.perf_counter()
+    x.firstFrame()
+    interactive = time.perf_counter()
+    report = {"importMs": (imported - STARTED) * 1000, "createMs": (created - imported) * 1000,
+              "firstFrameMs": (interactive - created) * 1000, "timeToInteractiveMs": (interactive - STARTED) * 1000,
+              "modules": len(sys.modules)}
+    x.startKeyboardListener()
+    report["keyboardListenerMs"] = (time.perf_counter() - interactive) * 1000
+    x.renderer.bye()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Circle Collector Game")
+    parser.add_argument("--profile", nargs="?", const="profile.json", default=None, metavar="FILE",
+                        help="record frame timings, show them on screen and dump them to FILE at exit")
+    parser.add_argument("--tick-rate", type=count, default=game.TICKRATE,
+                        help="simulation ticks per second (movement speed doesn't depend on it)")
+    parser.add_argument("--bubbles", type=count, default=1, help="amount of points bubbles in the arena")
+    parser.add_argument("--bosses", type=count, default=1, help="amount of bosses in the arena")
+    parser.add_argument("--record", metavar="FILE", help="record the seed and inputs of every game to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recording instead of reading the keyboard")
+    parser.add_argument("--fast-forward", type=int, default=0, metavar="TICKS",
+                        help="with --replay, run this many ticks without drawing first")
+    parser.add_argument("--renderer", choices=sorted(game.RENDERERS), default="turtle",
+                        help="draw with turtle or straight onto a tkinter canvas (faster)")
+    parser.add_argument("--telemetry", nargs="?", const="telemetry.jsonl", default=None, metavar="FILE",
+                        help="append game and frame telemetry to FILE (see telemetry.py)")
+    parser.add_argument("--governor", nargs="?", type=float, const=1000 / game.FRAMERATE, default=None, metavar="MS",
+                        help="shed HUD refreshes, frames and shape detail while a frame takes more than MS of work")
+    parser.add_argument("--startup", action="store_true",
+                        help="print the time to the first interactive frame and exit")
+    args = parser.parse_args()
+    run = measureStartup if args.startup else runGame
+    run(tickRate=args.tick_rate, profile=args.profile, pointsBubbles=args.bubbles, bosses=args.bosses, record=args.record,
+        replay=args.replay, fastForward=args.fast_forward, renderer=args.renderer, telemetry=args.telemetry,
+        frameBudget=args.governor)
@@ -0,0 +1,61 @@
+import heapq
+import itertools
+
+
+class Scheduler:
+    """
+    Timed actions and tweens advanced by the game loop, so effects play out over several ticks instead of
+    sleeping (which froze input and rendering)
+    """
+    def __init__(self):
+        self.time = 0  # Seconds advanced so far
+        self.actions = []  # Heap of (due time, order, callback)
+        self.tweens = []  # [start time, duration, update, done]
+        self.order = itertools.count()  # Keeps actions due at the same time in the order they were added
+
+    def after(self, delay, callback):
+        """
+        :param delay: Seconds from now
+        :param callback: Function called without arguments once the delay has passed
+        """
+        heapq.heappush(self.actions, (self.time + delay, next(self.order), callback))
+
+    def tween(self, duration, update, delay=0, done=None):
+        """
+        :param duration: Seconds the tween lasts
+        :param update: Function called with the progress (0 to 1) every advance while the tween runs
+        :param delay: Seconds before the tween starts
+        :param done: Function called without arguments once the tween finished
+        """
+        self.tweens.append([self.time + delay, duration, update, done])
+
+    def advance(self, seconds):
+        """
+        :param seconds: Time that passed since the last advance (one tick)
+        Runs every action that became due and updates the running tweens
+        """
+        self.time += seconds
+        if self.tweens:
+            running = []
+            for tween in self.tweens:
+                start, duration, update, done = tween
+                if self.time < start:
+                    running.append(tween)
+                    continue
+                progress = 1 if duration <= 0 else min(1, (self.time - start) / duration)
+                update(progress)
+                if progress < 1:
+                    running.append(tween)
+                elif done:
+                    done()
+            self.tweens = running
+        actions = self.actions
+        while actions and actions[0][0] <= self.time:
+            heapq.heappop(actions)[2]()
+
+    def clear(self):
+        """
+        Drops every pending action and tween
+        """
+        self.actions = []
+        self.tweens = []
@@ -0,0 +1,159 @@
+import bisect
+import os
+import queue
+import stat
+import tempfile
+import threading
+
+SCOREFILE = "score.xml"
+LEADERBOARDSIZE = 10
+
+
+def newFileMode():
+    """
+    Permissions open() gives a new file (0o666 without the umask bits)
+    """
+    umask = os.umask(0)  # The umask can only be read by setting it
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class ScoreStore:
+    """
+    High score leaderboard, read from the xml file once and served from memory
+
+    The file keeps one <name/><score/> pair per entry, best first, so the first pair is still the
+    single high score older versions of the game read:
+        <highscore><name text="xav" /><score text="1600" /><name text="bob" /><score text="900" /></highscore>
+    """
+    def __init__(self, path=SCOREFILE, size=LEADERBOARDSIZE, background=False):
+        """
+        :param path: xml file the scores are kept in
+        :param size: Amount of entries kept on the leaderboard
+        :param background: Save on a writer thread, add returns as soon as the leaderboard in memory is updated
+        """
+        self.path = path
+        self.size = size
+        self.entries = self.load()  # (name, score) tuples, best first
+        self.mode = newFileMode()  # Of a new xml file, read here as the umask is process wide (see save)
+        self.writes = None  # Leaderboard snapshots waiting for the writer thread
+        if background:
+            self.writes = queue.Queue()
+            threading.Thread(target=self.writer, name="score-writer", daemon=True).start()
+
+    def load(self):
+        """
+        Reads the leaderboard from the xml file, a missing, empty or broken file gives an empty leaderboard
+        """
+        import xml.etree.ElementTree as ET  # Imported on first use, keeps it out of the import of the game
+        try:
+            root = ET.parse(self.path).getroot()
+        except (OSError, ET.ParseError):
+            return []
+        names = [element.get("text", "") for element in root.iter("name")]
+        values = [element.get("text", "0") for element in root.iter("score")]
+        entries = []
+        for name, value in zip(names, values):
+            try:
+                entries.append((name, int(value)))
+            except ValueError:
+                continue
+        entries.sort(key=lambda entry: -entry[1])
+        return entries[:self.size]
+
+    def save(self, entries=None):
+        """
+        :param entries: Leaderboard to write, the current one if not given
+        Writes the leaderboard to a temporary file and renames it over the xml file, so a crash mid write
+        leaves the previous file untouched
+        """
+        import xml.etree.ElementTree as ET
+        root = ET.Element("highscore")
+        for name, score in self.entries if entries is None else entries:
+            ET.SubElement(root, "name", text=name)
+            ET.SubElement(root, "score", text=str(score))
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporaryPath = tempfile.mkstemp(prefix=".score-", suffix=".xml", dir=directory)
+        try:
+            with os.fdopen(handle, "wb") as temporaryFile:
+                ET.ElementTree(root).write(temporaryFile)
+                temporaryFile.flush()
+                os.fsync(temporaryFile.fileno())
+            try:  # mkstemp creates it 0600, keep the permissions the xml file has (or a new file would get)
+                mode = stat.S_IMODE(os.stat(self.path).st_mode)
+            except FileNotFoundError:
+                mode = self.mode
+            os.chmod(temporaryPath, mode)
+            os.replace(temporaryPath, self.path)
+        except BaseException:
+            os.unlink(temporaryPath)
+            raise
+
+    def writer(self):
+        """
+        Writer thread: saves the queued snapshots, only the newest when several are waiting
+        """
+        while True:
+            entries = self.writes.get()
+            skipped = 0
+            while True:
+                try:
+                    entries = self.writes.get_nowait()
+                    skipped += 1
+                except queue.Empty:
+                    break
+            try:
+                self.save(entries)
+            except OSError as error:
+                print("Could not save the scores to %s: %s" % (self.path, error))
+            finally:
+                for write in range(skipped + 1):
+                    self.writes.task_done()
+
+    def flush(self):
+        """
+        Waits until every score added so far is on disk
+        """
+        if self.writes is not None:
+            self.writes.join()
+
+    def getHighScore(self):
+        """
+        Gets the highscore, and the name of the user with the highscore (("", 0) if there are no scores yet)
+        """
+        if not self.entries:
+            return "", 0
+        return self.entries[0]
+
+    def leaderboard(self):
+        """
+        Copy of the leaderboard entries, best first
+        """
+        return list(self.entries)
+
+    def qualifies(self, score):
+        """
+        :param score: Points to check
+        True if the score would make it on the leaderboard
+        """
+        if score <= 0:
+            return False
+        return len(self.entries) < self.size or score > self.entries[-1][1]
+
+    def add(self, name, score):
+        """
+        :param name: Name of the player
+        :param score: Points scored
+        Adds an entry to the leaderboard (equal scores keep their older entries first) and saves it (in the
+        background if the store was created with background=True)
+        """
+        if not self.qualifies(score):
+            return False
+        position = bisect.bisect_right([-entry[1] for entry in self.entries], -score)
+        self.entries.insert(position, (name, score))
+        del self.entries[self.size:]
+        if self.writes is not None:
+            self.writes.put(list(self.entries))
+        else:
+            self.save()
+        return True
@@ -0,0 +1,139 @@
+"""
+Batch balancing simulator: plays thousands of headless games with bot policies, spread over every core
+
+    python simulate.py --games 2000
+    python simulate.py --param speedPerBubble=0.1,0.2,0.3 --param bossLives=5,7 --policy wallAvoiding
+    python simulate.py --sweep sweep.json --output results.json
+
+A sweep file is a json list of {"name": ..., "rules": {...}} where rules are keyword arguments of world.Rules.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+import bots
+import world
+from profiler import percentile
+
+MAXTICKS = 60 * 60 * 10  # Ten minutes of game time, games still running then count as survived
+
+
+def playGame(job):
+    """
+    :param job: (parameter set index, rules keyword arguments, policy name, seed, max ticks)
+    Plays one headless game and returns its result (runs in a worker process)
+    """
+    index, parameters, policyName, seed, maxTicks = job
+    policy = bots.POLICIES[policyName]
+    state = world.World(seed, rules=world.Rules(**parameters))
+    bossHits = 0
+    bossKilled = False
+    while not state.gameOver and state.ticks < maxTicks:
+        for event in state.step(policy(state)):
+            if event == world.BOSSHIT:
+                bossHits += 1
+            elif event == world.BOSSKILLED:
+                bossKilled = True
+    return {"set": index, "policy": policyName, "points": state.points, "ticks": state.ticks,
+            "died": state.gameOver, "bossHits": bossHits, "bossKilled": bossKilled}
+
+
+def distribution(values):
+    """
+    :param values: Numbers to summarise
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return {"mean": sum(ordered) / len(ordered), "p10": percentile(ordered, 0.1), "p50": percentile(ordered, 0.5),
+            "p90": percentile(ordered, 0.9), "max": ordered[-1]}
+
+
+def aggregate(results, tickLength=world.TICKLENGTH):
+    """
+    :param results: playGame results of one parameter set and policy
+    Score distribution, time to death (seconds, games that ended only) and boss kill rate
+    """
+    deaths = [result["ticks"] * tickLength for result in results if result["died"]]
+    return {"games": len(results), "points": distribution([result["points"] for result in results]),
+            "deathRate": len(deaths) / len(results), "timeToDeath": distribution(deaths),
+            "bossHits": distribution([result["bossHits"] for result in results]),
+            "bossKillRate": sum(result["bossKilled"] for result in results) / len(results)}
+
+
+def parameterSets(params, sweep):
+    """
+    :param params: "name=value1,value2" strings, combined as a grid
+    :param sweep: Path of a sweep json file or None
+    List of (name, rules keyword arguments)
+    """
+    sets = []
+    if sweep:
+        with open(sweep) as sweepFile:
+            sets.extend((entry["name"], entry.get("rules", {})) for entry in json.load(sweepFile))
+    if params:
+        names = []
+        choices = []
+        for param in params:
+            name, values = param.split("=", 1)
+            names.append(name)
+            choices.append([json.loads(value) for value in values.split(",")])
+        for combination in itertools.product(*choices):
+            parameters = dict(zip(names, combination))
+            sets.append((",".join("%s=%s" % item for item in parameters.items()), parameters))
+    return sets or [("default", {})]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless games with bots and aggregate the results")
+    parser.add_argument("--games", type=int, default=1000, help="games per parameter set and policy")
+    parser.add_argument("--policy", action="append", choices=sorted(bots.POLICIES),
+                        help="bot policy (repeatable, default: all)")
+    parser.add_argument("--param", action="append", metavar="NAME=V1,V2",
+                        help="world.Rules parameter values to sweep (repeatable, combined as a grid)")
+    parser.add_argument("--sweep", metavar="FILE", help="json list of named parameter sets")
+    parser.add_argument("--max-ticks", type=int, default=MAXTICKS, help="ticks after which a game is stopped")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (games use consecutive seeds)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", help="also write the json results to this file")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    try:
+        sets = parameterSets(args.param, args.sweep)
+    except (OSError, ValueError, KeyError) as error:
+        parser.error("bad --param or --sweep: %s" % error)
+    for name, parameters in sets:  # Caught here rather than as a traceback from every worker
+        try:
+            world.World(0, rules=world.Rules(**parameters))
+        except (TypeError, ValueError, ArithmeticError) as error:
+            parser.error("parameter set %s: %s" % (name, error))
+    policies = args.policy or sorted(bots.POLICIES)
+    jobs = [(index, parameters, policyName, args.seed + game, args.max_ticks)  # Keyed by index, names can repeat
+            for index, (name, parameters) in enumerate(sets) for policyName in policies for game in range(args.games)]
+    results = {}
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        chunkSize = max(1, len(jobs) // (args.workers * 8))  # Big enough to amortise the IPC, small enough to balance
+        for result in pool.imap_unordered(playGame, jobs, chunkSize):
+            results.setdefault((result["set"], result["policy"]), []).append(result)
+
+    report = {"games": len(jobs), "workers": args.workers, "seconds": time.perf_counter() - start, "sets": []}
+    for index, (name, parameters) in enumerate(sets):
+        rules = world.Rules(**parameters).asDict()
+        for policyName in policies:
+            summary = aggregate(results[(index, policyName)])
+            report["sets"].append(dict(name=name, policy=policyName, rules=rules, **summary))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            outputFile.write(output)
+
+
+if __name__ == "__main__":
+    main()
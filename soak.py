@@ -0,0 +1,268 @@
+"""
+Soak test: a bot plays for hours, retrying every game over, while resource usage is sampled at intervals. Fails
+when any of it keeps growing, so leaks are caught before the game is left running unattended. A bot rarely dies,
+so every game is ended after --game-length frames (its lives dropped to 0) to keep the retry path busy.
+
+    python soak.py --duration 7200                      # through Game (needs a display)
+    python soak.py --headless --duration 600            # World only
+    python soak.py --max-slope turtles=0 --max-slope rssKb=2048 --output soak.json
+
+Every sample records traced Python memory (tracemalloc), live turtles, canvas items, threads and RSS. Once the
+warm-up is over the samples of each metric are fitted with a least squares line, and a slope per hour above its
+limit fails the run (exit status 1). The bot plays as fast as it can, so an hour of soak is many hours of play.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import bots
+from benchmark import peakRss
+from world import World
+
+DURATION = 3600  # Seconds of soak by default
+INTERVAL = 30  # Seconds between samples
+WARMUP = 60  # Seconds of samples left out of the slopes (caches, fonts and the first games settling)
+MAXSLOPES = {"tracemallocKb": 1024, "turtles": 1, "canvasItems": 1, "threads": 1, "rssKb": 8192}  # Growth per hour
+TOPGROWTH = 10  # Source lines reported with the largest tracemalloc growth
+GAMELENGTH = 600  # Frames after which a game is ended by the soak
+
+
+def currentRss():
+    """
+    Resident set size of the process in kilobytes (the peak where the current one can't be read, None if neither)
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return peakRss()
+
+
+def slope(points):
+    """
+    :param points: (hours, value) pairs
+    Least squares growth per hour, 0 with fewer than two points or a metric that isn't measured
+    """
+    points = [(hours, value) for hours, value in points if value is not None]
+    if len(points) < 2:
+        return 0
+    meanHours = sum(hours for hours, value in points) / len(points)
+    meanValue = sum(value for hours, value in points) / len(points)
+    spread = sum((hours - meanHours) ** 2 for hours, value in points)
+    if not spread:
+        return 0
+    return sum((hours - meanHours) * (value - meanValue) for hours, value in points) / spread
+
+
+class GamePlayer:
+    """
+    Plays through Game: a bot steers, every frame is rendered and game overs are retried through the game over
+    prompt, like a player pressing ENTER
+    """
+    def __init__(self, policy, seed, renderer, directory, gameLength=GAMELENGTH):
+        """
+        :param policy: Bot policy (see bots.POLICIES)
+        :param seed: Seed of the first game
+        :param renderer: Renderer backend name
+        :param directory: Where the scores of the soak are written (the real leaderboard is left alone)
+        :param gameLength: Frames after which a game is ended
+        """
+        import game  # Needs Tk and a display
+        self.game = game.Game(seed=seed, renderer=renderer)
+        self.game.scores.path = os.path.join(directory, "score.xml")
+        self.policy = policy
+        self.gameLength = gameLength
+        self.gameFrames = 0  # Frames of the current game
+        self.ticksPerFrame = max(1, round(self.game.tickRate / self.game.frameRate))
+        self.games = 1
+        self.game.startKeyboardListener()  # Its thread is part of what is watched
+        self.listener = self.game.listener is not None
+        self.game.prepare()
+
+    def frame(self):
+        newGame = self.game
+        self.gameFrames += 1
+        if self.gameFrames >= self.gameLength:
+            newGame.world.player.lives = 0  # Game over on the next tick
+        for tick in range(self.ticksPerFrame):
+            newGame.inputs.extend(self.policy(newGame.world))
+            newGame.tick()
+            if newGame.ending:
+                newGame.endingKey("Return", "\r")
+                self.games += 1
+                self.gameFrames = 0
+        newGame.renderFrame()
+
+    def measure(self):
+        renderer = self.game.renderer
+        return {"turtles": len(renderer.turtles()), "canvasItems": len(renderer.canvas.find_all())}
+
+    def close(self):
+        self.game.scores.flush()
+        if self.game.listener:
+            self.game.listener.stop()
+        self.game.renderer.bye()
+
+
+class HeadlessPlayer:
+    """
+    Plays through World only, restarting the world on game over
+    """
+    def __init__(self, policy, seed, gameLength=GAMELENGTH):
+        """
+        :param policy: Bot policy (see bots.POLICIES)
+        :param seed: Seed of the first game
+        :param gameLength: Frames after which a game is ended
+        """
+        self.state = World(seed)
+        self.policy = policy
+        self.gameLength = gameLength
+        self.gameFrames = 0
+        self.games = 1
+        self.listener = False
+
+    def frame(self):
+        state = self.state
+        self.gameFrames += 1
+        if self.gameFrames >= self.gameLength:
+            state.player.lives = 0
+        state.step(self.policy(state))
+        if state.gameOver:
+            state.reset()
+            self.games += 1
+            self.gameFrames = 0
+
+    def measure(self):
+        return {"turtles": None, "canvasItems": None}
+
+    def close(self):
+        pass
+
+
+def sample(player, start, games):
+    """
+    :param player: GamePlayer or HeadlessPlayer
+    :param start: perf_counter value the soak started at
+    :param games: Games played by the previous sample, retries are counted from there
+    """
+    result = {"seconds": time.perf_counter() - start, "games": player.games, "retries": player.games - games,
+              "tracemallocKb": tracemalloc.get_traced_memory()[0] // 1024, "threads": threading.active_count(),
+              "rssKb": currentRss()}
+    result.update(player.measure())
+    return result
+
+
+def topGrowth(before, after, limit=TOPGROWTH):
+    """
+    :param before: tracemalloc snapshot at the end of the warm-up
+    :param after: tracemalloc snapshot at the end of the soak
+    Source lines whose allocations grew the most in between
+    """
+    statistics = after.compare_to(before, "lineno")[:limit]
+    return [{"line": str(statistic.traceback), "growthKb": statistic.size_diff / 1024, "count": statistic.count_diff}
+            for statistic in statistics if statistic.size_diff > 0]
+
+
+def parseSlopes(values):
+    """
+    :param values: "name=value" strings overriding MAXSLOPES
+    """
+    limits = dict(MAXSLOPES)
+    for value in values or ():
+        name, limit = value.split("=", 1)
+        if name not in limits:
+            raise ValueError("Unknown metric %s (choose from %s)" % (name, ", ".join(sorted(limits))))
+        limits[name] = float(limit)
+    return limits
+
+
+def soak(player, duration, interval, warmup):
+    """
+    :param player: GamePlayer or HeadlessPlayer
+    :param duration: Seconds to play for
+    :param interval: Seconds between samples
+    :param warmup: Seconds before the samples count towards the slopes
+    Plays and samples until duration is up, returns (frames, samples, growth of the top source lines)
+    """
+    clock = time.perf_counter
+    start = clock()
+    samples = [sample(player, start, player.games)]
+    settled = None  # tracemalloc snapshot at the end of the warm-up
+    nextSample = start + interval
+    frames = 0
+    while True:
+        player.frame()
+        frames += 1
+        now = clock()
+        if now < nextSample:
+            continue
+        if settled is None and now - start >= warmup:
+            settled = tracemalloc.take_snapshot()  # Before the sample, so keeping it isn't counted as growth
+        samples.append(sample(player, start, samples[-1]["games"]))
+        if now - start >= duration:
+            break
+        nextSample += interval
+    growth = topGrowth(settled, tracemalloc.take_snapshot()) if settled else []
+    return frames, samples, growth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play for a long time and fail if memory or objects keep growing")
+    parser.add_argument("--headless", action="store_true", help="play through World only, without rendering")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds to play for")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between samples")
+    parser.add_argument("--warmup", type=float, default=WARMUP, help="seconds of samples left out of the slopes")
+    parser.add_argument("--max-slope", action="append", metavar="METRIC=PER_HOUR",
+                        help="largest growth per hour allowed for a metric (repeatable, metrics: %s)"
+                        % ", ".join(sorted(MAXSLOPES)))
+    parser.add_argument("--game-length", type=int, default=GAMELENGTH, metavar="FRAMES",
+                        help="frames after which each game is ended, so the retry path keeps running")
+    parser.add_argument("--policy", choices=sorted(bots.POLICIES), default="greedy", help="bot policy")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first game")
+    parser.add_argument("--renderer", choices=("turtle", "canvas"), default="turtle", help="renderer backend")
+    parser.add_argument("--output", help="also write the json results to this file")
+    args = parser.parse_args(argv)
+    try:
+        limits = parseSlopes(args.max_slope)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.game_length < 1:
+        parser.error("--game-length must be at least 1")
+
+    tracemalloc.start()
+    policy = bots.POLICIES[args.policy]
+    with tempfile.TemporaryDirectory() as directory:
+        if args.headless:
+            player = HeadlessPlayer(policy, args.seed, args.game_length)
+        else:
+            player = GamePlayer(policy, args.seed, args.renderer, directory, args.game_length)
+        try:
+            frames, samples, growth = soak(player, args.duration, args.interval, args.warmup)
+        finally:
+            player.close()
+    tracemalloc.stop()
+
+    settled = [entry for entry in samples if entry["seconds"] >= args.warmup]
+    slopes = {metric: slope([(entry["seconds"] / 3600, entry[metric]) for entry in settled]) for metric in limits}
+    failed = sorted(metric for metric, limit in limits.items() if slopes[metric] > limit)
+    results = {"mode": "headless" if args.headless else "game", "renderer": None if args.headless else args.renderer,
+               "policy": args.policy, "gameLength": args.game_length, "seed": args.seed,
+               "listener": player.listener, "frames": frames, "games": player.games, "samples": samples,
+               "slopesPerHour": slopes, "maxSlopesPerHour": limits, "failed": failed, "topGrowth": growth}
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            outputFile.write(output)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Opt-in telemetry: game starts and ends, points over time, boss hits, slow bubbles used, lives lost and frame time
+summaries, one json object per line in an append-only log
+
+Records are buffered by the game loop and handed over in batches to a writer thread, which serialises them and
+rotates the log once it grows past its size limit (telemetry.jsonl, then telemetry.jsonl.1 the older one and so
+on), so logging never waits on the disk. The reader streams the logs line by line, however large they get.
+
+    python telemetry.py telemetry.jsonl                    # aggregates a log and its rotated files
+    python telemetry.py kiosk1/telemetry.jsonl kiosk2/telemetry.jsonl --output fleet.json
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+from profiler import percentile
+
+TELEMETRYFILE = "telemetry.jsonl"
+MAXBYTES = 1024 * 1024  # Size a log is rotated at
+BACKUPS = 5  # Rotated files kept (the oldest is deleted)
+BATCHSIZE = 64  # Records buffered before they are handed to the writer thread
+FRAMESUMMARY = 600  # Frames summarised in one "frames" record
+POINTSBUCKET = 50  # Width of the points histogram used for the aggregated percentiles
+
+
+class TelemetryLog:
+    """
+    Size rotated append-only log written by a background thread
+    """
+    def __init__(self, path=TELEMETRYFILE, maxBytes=MAXBYTES, backups=BACKUPS, batchSize=BATCHSIZE):
+        """
+        :param path: Log file (appended to)
+        :param maxBytes: Size after which the log is rotated
+        :param backups: Amount of rotated files kept
+        :param batchSize: Records buffered before they are handed to the writer thread
+        """
+        self.path = path
+        self.maxBytes = maxBytes
+        self.backups = backups
+        self.batchSize = batchSize
+        self.pending = []  # Records not handed over yet
+        self.frameTimes = []  # Frame times (milliseconds) not summarised yet
+        self.batches = queue.Queue()  # Lists of records, None stops the writer
+        self.thread = threading.Thread(target=self.writer, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    def log(self, kind, **fields):
+        """
+        :param kind: Record type (e.g. "gameStart")
+        :param fields: Values of the record, json serialisable
+        """
+        fields["type"] = kind
+        fields["time"] = time.time()
+        self.pending.append(fields)
+        if len(self.pending) >= self.batchSize:
+            self.handOver()
+
+    def frame(self, milliseconds):
+        """
+        :param milliseconds: Time since the previous frame
+        Logs a "frames" summary once FRAMESUMMARY frames are collected
+        """
+        self.frameTimes.append(milliseconds)
+        if len(self.frameTimes) >= FRAMESUMMARY:
+            self.summariseFrames()
+
+    def summariseFrames(self):
+        if not self.frameTimes:
+            return
+        ordered = sorted(self.frameTimes)
+        self.frameTimes = []
+        self.log("frames", count=len(ordered), mean=sum(ordered) / len(ordered), p50=percentile(ordered, 0.5),
+                 p95=percentile(ordered, 0.95), max=ordered[-1])
+
+    def handOver(self):
+        """
+        Gives the buffered records to the writer thread (e.g. at the end of a game, so a crash loses little)
+        """
+        if self.pending:
+            self.batches.put(self.pending)
+            self.pending = []
+
+    def writer(self):
+        """
+        Writer thread: writes every batch waiting in one go, rotating the log when it gets too big
+        """
+        stopping = False
+        while not stopping:
+            batch = self.batches.get()
+            if batch is None:
+                break
+            records = list(batch)
+            while True:
+                try:
+                    batch = self.batches.get_nowait()
+                except queue.Empty:
+                    break
+                if batch is None:
+                    stopping = True
+                    break
+                records.extend(batch)
+            try:
+                self.write(records)
+            except OSError as error:
+                print("Could not write telemetry to %s: %s" % (self.path, error))
+
+    def write(self, records):
+        """
+        :param records: Records to append, the log is rotated in between when it would grow past maxBytes
+        """
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        lines = []
+        for record in records:
+            line = json.dumps(record) + "\n"  # ascii, so its length is its size in bytes
+            if size and size + len(line) > self.maxBytes:
+                self.append(lines)
+                lines = []
+                self.rotate()
+                size = 0
+            lines.append(line)
+            size += len(line)
+        self.append(lines)
+
+    def append(self, lines):
+        if lines:
+            with open(self.path, "a") as logFile:
+                logFile.write("".join(lines))
+
+    def rotate(self):
+        """
+        Renames path to path.1, path.1 to path.2 and so on, deleting the oldest
+        """
+        for number in range(self.backups, 0, -1):
+            older = "%s.%d" % (self.path, number)
+            newer = "%s.%d" % (self.path, number - 1) if number > 1 else self.path
+            if os.path.exists(newer):
+                os.replace(newer, older)
+        if not self.backups:
+            os.unlink(self.path)
+
+    def close(self):
+        """
+        Writes everything still buffered and stops the writer thread
+        """
+        if not self.thread.is_alive():
+            return
+        self.summariseFrames()
+        self.handOver()
+        self.batches.put(None)
+        self.thread.join()
+
+
+def logFiles(path):
+    """
+    :param path: Log file
+    The log and its rotated files that exist, oldest first
+    """
+    files = []
+    number = 1
+    while os.path.exists("%s.%d" % (path, number)):
+        files.append("%s.%d" % (path, number))
+        number += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def readRecords(paths):
+    """
+    :param paths: Log files (their rotated files are read too)
+    Yields the records one at a time, oldest first per log (a line cut short by a crash is skipped)
+    """
+    for path in paths:
+        for logPath in logFiles(path):
+            with open(logPath) as logFile:
+                for line in logFile:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+
+class Aggregate:
+    """
+    Running totals over a stream of records, nothing but counters and a points histogram is kept
+    """
+    def __init__(self):
+        self.gamesStarted = 0
+        self.gamesEnded = 0
+        self.points = {}  # Histogram of the final points, POINTSBUCKET wide buckets
+        self.pointsTotal = 0
+        self.pointsMax = 0
+        self.secondsTotal = 0
+        self.bossHits = 0
+        self.bossKills = 0
+        self.slowBubblesUsed = 0
+        self.livesLost = 0
+        self.frames = 0
+        self.frameTotal = 0  # Milliseconds
+        self.frameMax = 0
+        self.frameP95Max = 0
+
+    def add(self, record):
+        """
+        :param record: Record read from a log
+        """
+        kind = record.get("type")
+        if kind == "gameStart":
+            self.gamesStarted += 1
+        elif kind == "gameEnd":
+            self.gamesEnded += 1
+            points = record["points"]
+            bucket = points // POINTSBUCKET * POINTSBUCKET
+            self.points[bucket] = self.points.get(bucket, 0) + 1
+            self.pointsTotal += points
+            self.pointsMax = max(self.pointsMax, points)
+            self.secondsTotal += record["seconds"]
+        elif kind == "bossHit":
+            self.bossHits += 1
+            self.bossKills += record.get("killed", False)
+        elif kind == "slowBubbleUsed":
+            self.slowBubblesUsed += 1
+        elif kind == "lifeLost":
+            self.livesLost += 1
+        elif kind == "frames":
+            self.frames += record["count"]
+            self.frameTotal += record["mean"] * record["count"]
+            self.frameMax = max(self.frameMax, record["max"])
+            self.frameP95Max = max(self.frameP95Max, record["p95"])
+
+    def pointsPercentile(self, fraction):
+        """
+        :param fraction: 0 to 1
+        Lower edge of the histogram bucket holding that percentile of the final points
+        """
+        rank = fraction * self.gamesEnded
+        seen = 0
+        for bucket in sorted(self.points):
+            seen += self.points[bucket]
+            if seen >= rank:
+                return bucket
+        return 0
+
+    def summary(self):
+        ended = self.gamesEnded or 1
+        return {"gamesStarted": self.gamesStarted, "gamesEnded": self.gamesEnded,
+                "points": {"mean": self.pointsTotal / ended, "p50": self.pointsPercentile(0.5),
+                           "p90": self.pointsPercentile(0.9), "max": self.pointsMax},
+                "secondsPerGame": self.secondsTotal / ended, "bossHits": self.bossHits, "bossKills": self.bossKills,
+                "slowBubblesUsed": self.slowBubblesUsed, "livesLost": self.livesLost,
+                "perGame": {"bossHits": self.bossHits / ended, "slowBubblesUsed": self.slowBubblesUsed / ended,
+                            "livesLost": self.livesLost / ended},
+                "frames": {"count": self.frames, "meanMs": self.frameTotal / (self.frames or 1),
+                           "worstP95Ms": self.frameP95Max, "maxMs": self.frameMax}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate telemetry logs")
+    parser.add_argument("logs", nargs="+", help="telemetry logs (their rotated files are read too)")
+    parser.add_argument("--output", help="also write the json results to this file")
+    args = parser.parse_args(argv)
+
+    aggregate = Aggregate()
+    for record in readRecords(args.logs):
+        aggregate.add(record)
+    output = json.dumps(aggregate.summary(), indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            outputFile.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import heapq
+import itertools
+
+
+class ScoreTriggers:
+    """
+    Callbacks fired when the score crosses a threshold, so the rules tied to points only run when points change
+    (polling exact values every tick missed thresholds the score jumped over, boss hits give 25 or 250)
+
+    Triggers are registered once, then the pending thresholds are kept in a heap: a score change only looks at
+    the thresholds it crossed.
+    """
+    def __init__(self):
+        self.triggers = []  # (first threshold, interval or 0, order, callback), the compiled table
+        self.pending = []  # Heap of (threshold, order, interval, callback) not crossed yet
+        self.order = itertools.count()  # Keeps triggers on the same threshold in the order they were added
+        self.score = 0
+
+    def at(self, threshold, callback):
+        """
+        :param threshold: Score at which callback fires
+        :param callback: Function called with the threshold once the score reaches it
+        """
+        self.add(threshold, 0, callback)
+
+    def every(self, interval, callback, start):
+        """
+        :param interval: Points between two firings
+        :param callback: Function called with the threshold every time the score reaches start + n * interval
+        :param start: First threshold
+        """
+        if interval <= 0:
+            raise ValueError("Trigger interval must be positive, got %r" % (interval,))
+        self.add(start, interval, callback)
+
+    def add(self, threshold, interval, callback):
+        trigger = (threshold, interval, next(self.order), callback)
+        self.triggers.append(trigger)
+        self.push(trigger, self.score)
+
+    def push(self, trigger, score):
+        """
+        :param trigger: Entry of the table
+        :param score: Score already reached
+        Schedules the first threshold of trigger above score
+        """
+        threshold, interval, order, callback = trigger
+        if threshold <= score:
+            if not interval:
+                return
+            threshold += ((score - threshold) // interval + 1) * interval
+        heapq.heappush(self.pending, (threshold, order, interval, callback))
+
+    def rewind(self, score=0):
+        """
+        :param score: Score the triggers start from (thresholds up to it count as crossed)
+        """
+        self.score = score
+        self.pending = []
+        for trigger in self.triggers:
+            self.push(trigger, score)
+
+    def update(self, score):
+        """
+        :param score: New score
+        Fires every threshold crossed since the last update, in ascending order (a lower score rewinds instead)
+        """
+        if score < self.score:
+            self.rewind(score)
+            return
+        self.score = score
+        pending = self.pending
+        while pending and pending[0][0] <= score:
+            threshold, order, interval, callback = heapq.heappop(pending)
+            if interval:
+                heapq.heappush(pending, (threshold + interval, order, interval, callback))
+            callback(threshold)
@@ -0,0 +1,397 @@
+"""
+Lockstep environment stepping thousands of independent games at once with NumPy
+
+Every game is one row of the state arrays and VecWorld.step applies the same rules as World.step (inputs,
+movement, boundary, collisions, boss) to all of them with array operations. Spawn positions come from one
+random.Random per game seeded like World, drawn only for the games that need one, so a game of a VecWorld
+plays exactly like World(seed) given the same inputs (the normal arena: one points bubble, one boss).
+
+    python vecenv.py --envs 4096 --steps 1000    # parity check against World, then throughput
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+import world
+
+NOINPUT = 0
+ACTIONS = (None,) + world.INPUTS  # Action codes: 0 is no input, i + 1 is world.INPUTS[i]
+LEFT, RIGHT, PAUSE, RESUME, UNSTICK, SLOW = range(1, 7)
+# Headings are always multiples of 30 degrees, so the direction table is computed once with the same math
+# functions Entity.forward uses
+COS = np.array([math.cos(math.radians(30 * index)) for index in range(12)])
+SIN = np.array([math.sin(math.radians(30 * index)) for index in range(12)])
+BACKX = -world.KNOCKBACK * math.cos(0)  # The boss always faces east
+BACKY = -world.KNOCKBACK * math.sin(0)
+
+
+class VecWorld:
+    """
+    n independent games advanced in lockstep
+    """
+    def __init__(self, n, seed=0, rules=None, tickLength=world.TICKLENGTH, autoReset=False):
+        """
+        :param n: Amount of games
+        :param seed: Game i starts with seed + i
+        :param rules: world.Rules shared by every game
+        :param tickLength: Seconds of game time per step
+        :param autoReset: Start a new game (new seed) in the same row as soon as a game is over
+        """
+        self.n = n
+        self.rules = rules or world.Rules()
+        self.tickLength = tickLength
+        self.speedScale = world.SPEEDUNIT * tickLength
+        self.autoReset = autoReset
+        rules = self.rules
+        # Score triggers of World.scoreTriggers as crossing tests, daze points before the boss spawn never daze it
+        self.dazePoints = np.array([points for points in rules.bossDazePoints if points >= rules.bossSpawnPoints],
+                                   dtype=np.int64)
+        lastDazePoints = rules.bossDazePoints[-1] if rules.bossDazePoints else 0
+        self.redazeStart = (lastDazePoints // rules.bossDazeInterval + 1) * rules.bossDazeInterval
+        if self.redazeStart < rules.bossSpawnPoints:
+            self.redazeStart += -(-(rules.bossSpawnPoints - self.redazeStart) // rules.bossDazeInterval) * \
+                rules.bossDazeInterval
+        self.seedSource = random.Random(seed)
+        self.randoms = [random.Random() for game in range(n)]
+        self.seeds = np.zeros(n, dtype=np.int64)
+        self.time = np.zeros(n)  # Scheduler time, like World.scheduler it is not reset between games
+        floats = ("px", "py", "fromX", "fromY", "speed", "bubbleX", "bubbleY", "bossX", "bossY", "slowX", "slowY", "hitTime",
+                  "knockX", "knockY")
+        for name in floats:
+            setattr(self, name, np.zeros(n))
+        ints = ("heading", "lives", "points", "slowBubbles", "bossLives", "ticks")
+        for name in ints:
+            setattr(self, name, np.zeros(n, dtype=np.int64))
+        flags = ("moving", "stunned", "needsUnsticking", "slowNeedsShowing", "slowConfigured", "bossVisible",
+                 "bossConfigured", "bossDazzed", "gameOver", "flyBack", "comeBack", "removeBoss", "recovering")
+        for name in flags:
+            setattr(self, name, np.zeros(n, dtype=bool))
+        self.reset(np.arange(n), [seed + game for game in range(n)])
+
+    def randomPos(self, game):
+        """
+        Random position inside the boundary for one game (same draws as World.randomPos)
+        """
+        generator = self.randoms[game]
+        return (generator.randint(world.BOUNDARYX[0], world.BOUNDARYX[1]),
+                generator.randint(world.BOUNDARYY[0], world.BOUNDARYY[1]))
+
+    def reset(self, games, seeds=None):
+        """
+        :param games: Indexes of the games to restart
+        :param seeds: Seed of each game, new ones are drawn if not given
+        """
+        games = np.asarray(games, dtype=np.int64)
+        if seeds is None:
+            seeds = [self.seedSource.randrange(2 ** 32) for game in games]
+        for game, seed in zip(games.tolist(), seeds):
+            self.seeds[game] = seed
+            self.randoms[game].seed(seed)
+            self.bubbleX[game], self.bubbleY[game] = self.randomPos(game)
+        self.px[games] = 0
+        self.py[games] = 0
+        self.fromX[games] = 0
+        self.fromY[games] = 0
+        self.heading[games] = 0
+        self.speed[games] = 1
+        self.lives[games] = 3
+        self.bossX[games] = 200
+        self.bossY[games] = 200
+        self.bossLives[games] = self.rules.bossLives
+        self.slowX[games] = world.OFFSCREEN[0]
+        self.slowY[games] = world.OFFSCREEN[1]
+        for name in ("points", "slowBubbles", "ticks"):
+            getattr(self, name)[games] = 0
+        for name in ("stunned", "needsUnsticking", "slowNeedsShowing", "slowConfigured", "bossVisible",
+                     "bossConfigured", "bossDazzed", "gameOver", "flyBack", "comeBack", "removeBoss", "recovering"):
+            getattr(self, name)[games] = False
+        self.moving[games] = True
+
+    def step(self, actions):
+        """
+        :param actions: One action code per game (see ACTIONS)
+        Advances every game by one tick, returns (points gained, games that just ended)
+        """
+        actions = np.asarray(actions)
+        pointsBefore = self.points.copy()
+        overBefore = self.gameOver.copy()
+        self.applyInputs(actions)
+        self.movement()
+        self.boundaryPackage()
+        playerBubble, playerBoss, bubbleBoss, playerSlow = self.contacts()
+        self.slowBubbleCollision(playerSlow)
+        self.pointsBubbleCollision(playerBubble)
+        self.slowBubbleVisibility()
+        self.bossCollision(playerBoss, bubbleBoss)
+        self.ticks += 1
+        ended = self.gameOver & ~overBefore
+        rewards = self.points - pointsBefore
+        if self.autoReset and ended.any():
+            self.reset(np.flatnonzero(ended))
+        return rewards, ended
+
+    def applyInputs(self, actions):
+        """
+        Same as World.applyInput, one input per game
+        """
+        self.heading[actions == LEFT] += 1
+        self.heading[actions == RIGHT] -= 1
+        self.heading %= 12
+        self.moving[actions == PAUSE] = False
+        self.moving[actions == RESUME] = True
+        unstick = actions == UNSTICK
+        self.needsUnsticking[unstick] = True
+        self.lives[unstick] = 3
+        self.moving[unstick] = False
+        slow = (actions == SLOW) & (self.slowBubbles >= 1) & (self.speed > self.rules.minSpeed)
+        self.slowBubbles[slow] -= 1
+        self.speed[slow] += -1
+
+    def movement(self):
+        """
+        Advances the boss knock-back effects (like World.scheduler), then moves the players that can move
+        """
+        self.time += self.tickLength
+        time = self.time
+        if self.flyBack.any() or self.comeBack.any() or self.removeBoss.any() or self.recovering.any():
+            duration = world.KNOCKBACKTIME
+            flying = self.flyBack & (time >= self.hitTime)
+            if flying.any():
+                progress = np.minimum(1, (time[flying] - self.hitTime[flying]) / duration)
+                self.bossX[flying] = self.knockX[flying] + BACKX * progress
+                self.bossY[flying] = self.knockY[flying] + BACKY * progress
+                self.flyBack[np.flatnonzero(flying)[progress >= 1]] = False
+            comeStart = self.hitTime + 2 * world.KNOCKBACKTIME
+            coming = self.comeBack & (time >= comeStart)
+            if coming.any():
+                progress = np.minimum(1, (time[coming] - comeStart[coming]) / duration)
+                self.bossX[coming] = self.knockX[coming] + BACKX * (1 - progress)
+                self.bossY[coming] = self.knockY[coming] + BACKY * (1 - progress)
+                self.comeBack[np.flatnonzero(coming)[progress >= 1]] = False
+            removing = self.removeBoss & (self.hitTime + 2 * world.KNOCKBACKTIME <= time)
+            self.bossX[removing] = 4000
+            self.bossY[removing] = 4000
+            self.removeBoss[removing] = False
+            recovered = self.recovering & (self.hitTime + world.RECOVERTIME <= time)
+            self.stunned[recovered] = False
+            self.recovering[recovered] = False
+        self.fromX[:] = self.px
+        self.fromY[:] = self.py
+        move = self.moving & ~self.stunned
+        distance = self.speed[move] * self.speedScale
+        self.px[move] += distance * COS[self.heading[move]]
+        self.py[move] += distance * SIN[self.heading[move]]
+
+    def teleport(self, games, x, y):
+        """
+        World.teleport for the selected games
+        """
+        self.px[games] = x
+        self.py[games] = y
+        self.fromX[games] = x
+        self.fromY[games] = y
+
+    def boundaryPackage(self):
+        """
+        boundaryCheck, stuckCheck, speedCap and livesValidation of World
+        """
+        left, right = world.BOUNDARYX
+        bottom, top = world.BOUNDARYY
+        out = np.flatnonzero((self.px < left) | (self.px > right) | (self.py < bottom) | (self.py > top))
+        if len(out):
+            fromX, fromY, x, y = self.fromX[out], self.fromY[out], self.px[out], self.py[out]
+            fraction = np.ones(len(out))
+            with np.errstate(divide="ignore", invalid="ignore"):  # Only the lanes where the end is outside count
+                for start, end, lowest, highest in ((fromX, x, left, right), (fromY, y, bottom, top)):
+                    above = np.where(start <= highest, (highest - start) / (end - start), 0.0)
+                    below = np.where(start >= lowest, (lowest - start) / (end - start), 0.0)
+                    fraction = np.where(end > highest, np.minimum(fraction, above),
+                                        np.where(end < lowest, np.minimum(fraction, below), fraction))
+            self.px[out] = np.minimum(np.maximum(fromX + (x - fromX) * fraction, left), right)
+            self.py[out] = np.minimum(np.maximum(fromY + (y - fromY) * fraction, bottom), top)
+            self.heading[out] = (self.heading[out] + 6) % 12
+            self.lives[out] -= 1
+
+        self.teleport(self.needsUnsticking, *world.SAFEPOS)
+        self.needsUnsticking[:] = False
+
+        self.speed[np.round(self.speed, 2) >= self.rules.maxSpeed] = self.rules.maxSpeed
+        self.speed[np.round(self.speed, 2) <= self.rules.minSpeed] = self.rules.minSpeed
+
+        over = (self.lives <= 0) & ~self.gameOver
+        self.moving[over] = False
+        self.teleport(over, 2000, 2000)
+        self.gameOver[over] = True
+
+    def contacts(self):
+        """
+        The overlapping pairs of every game (same tests as collision.CollisionGrid, the player sweeps its move)
+        """
+        def overlap(x, y, otherX, otherY, reach):
+            return (np.abs(x - otherX) <= reach) & (np.abs(y - otherY) <= reach)
+        return (self.sweepHits(self.bubbleX, self.bubbleY, world.BUBBLEREACH),
+                self.sweepHits(self.bossX, self.bossY, world.BOSSREACH),
+                overlap(self.bossX, self.bossY, self.bubbleX, self.bubbleY, world.BOSSREACH),
+                self.sweepHits(self.slowX, self.slowY, world.BUBBLEREACH))
+
+    def sweepHits(self, centreX, centreY, reach):
+        """
+        collision.segmentHitsBox of the player's move against one box per game
+        """
+        low = np.zeros(self.n)
+        high = np.ones(self.n)
+        hit = np.ones(self.n, dtype=bool)
+        for start, end, centre in ((self.fromX, self.px, centreX), (self.fromY, self.py, centreY)):
+            lowest = centre - reach
+            highest = centre + reach
+            delta = end - start
+            still = delta == 0
+            hit &= ~still | ((start >= lowest) & (start <= highest))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                near = (lowest - start) / delta
+                far = (highest - start) / delta
+            low = np.maximum(low, np.where(still, 0.0, np.minimum(near, far)))
+            high = np.minimum(high, np.where(still, 1.0, np.maximum(near, far)))
+        return hit & (low <= high)
+
+    def respawnBubbles(self, games):
+        """
+        New points bubble position for the selected games
+        """
+        for game in np.flatnonzero(games).tolist():
+            self.bubbleX[game], self.bubbleY[game] = self.randomPos(game)
+
+    def addPoints(self, games, amount):
+        """
+        :param games: Mask of the games gaining points
+        :param amount: Points gained
+        Same as World.addPoints: fires the score triggers (boss spawn, boss daze, slow bubble spawn) of the
+        thresholds crossed
+        """
+        games = np.flatnonzero(games)
+        if not len(games):
+            return
+        rules = self.rules
+        old = self.points[games]
+        new = old + amount
+        self.points[games] = new
+
+        def crossedEvery(start, interval):
+            return (new >= start) & ((new - start) // interval > (old - start) // interval)
+
+        spawned = games[(old < rules.bossSpawnPoints) & (new >= rules.bossSpawnPoints)]
+        self.bossVisible[spawned] = True
+        self.bossConfigured[spawned] = True
+        self.bossDazzed[spawned] = False
+        dazePoints = self.dazePoints
+        daze = ((old[:, None] < dazePoints) & (new[:, None] >= dazePoints)).any(axis=1) | \
+            (crossedEvery(self.redazeStart, rules.bossDazeInterval) & (self.bossLives[games] > 1))
+        self.bossDazzed[games[daze]] = True
+        slow = games[crossedEvery(rules.slowBubbleStart, rules.slowBubbleInterval)]
+        slow = slow[~self.slowConfigured[slow]]
+        self.slowNeedsShowing[slow] = True
+        self.slowConfigured[slow] = True
+
+    def slowBubbleCollision(self, playerSlow):
+        self.slowBubbles[playerSlow] += 1
+        self.slowX[playerSlow] = world.OFFSCREEN[0]
+        self.slowY[playerSlow] = world.OFFSCREEN[1]
+        self.slowConfigured[playerSlow] = False
+        self.addPoints(playerSlow, 10)
+
+    def pointsBubbleCollision(self, playerBubble):
+        self.respawnBubbles(playerBubble)
+        self.addPoints(playerBubble, 10)
+        self.speed[playerBubble] += self.rules.speedPerBubble
+        self.lives[playerBubble & (self.lives < 3)] = 3
+
+    def slowBubbleVisibility(self):
+        for game in np.flatnonzero(self.slowNeedsShowing).tolist():
+            self.slowX[game], self.slowY[game] = self.randomPos(game)
+        self.slowNeedsShowing[:] = False
+
+    def bossCollision(self, playerBoss, bubbleBoss):
+        """
+        Same as World.bossCollision, for the games where the boss has spawned
+        """
+        active = self.bossConfigured.copy()
+        self.respawnBubbles(active & bubbleBoss)
+        touching = active & playerBoss
+        self.lives[touching & ~self.bossDazzed] -= 5
+        hit = touching & self.bossDazzed
+        if hit.any():
+            self.bossLives[hit] -= 1
+            self.teleport(hit, *world.SAFEPOS)
+            alive = hit & (self.bossLives >= 1)
+            killed = hit & ~alive
+            self.bossDazzed[hit] = False
+            self.speed[alive] += -0.8
+            self.addPoints(alive, 25)
+            self.speed[killed] += -1.6
+            self.addPoints(killed, 250)
+            # Knock-back, timed like World.knockBack
+            self.hitTime[hit] = self.time[hit]
+            self.knockX[hit] = self.bossX[hit]
+            self.knockY[hit] = self.bossY[hit]
+            self.stunned[hit] = True
+            self.flyBack[hit] = True
+            self.comeBack[alive] = True
+            self.removeBoss[killed] = True
+            self.recovering[hit] = True
+
+    def observations(self):
+        """
+        One row per game: player x, y, heading (degrees), speed, lives, points, bubble x, y, boss x, y, boss dazzed,
+        boss visible
+        """
+        return np.stack([self.px, self.py, self.heading * 30.0, self.speed, self.lives, self.points, self.bubbleX,
+                         self.bubbleY, self.bossX, self.bossY, self.bossDazzed, self.bossVisible], axis=1)
+
+
+def parityCheck(seeds, steps, actionSeed=0):
+    """
+    :param seeds: Seeds of the games to compare
+    :param steps: Steps per game
+    :param actionSeed: Seed of the random actions both sides receive
+    Plays the same random actions through VecWorld and World, returns the seeds whose games differ
+    """
+    vec = VecWorld(len(seeds), 0)
+    vec.reset(np.arange(len(seeds)), seeds)
+    worlds = [world.World(seed) for seed in seeds]
+    actionSource = np.random.default_rng(actionSeed)
+    for stepNumber in range(steps):
+        actions = actionSource.choice(len(ACTIONS), size=len(seeds), p=[0.8, 0.08, 0.08, 0.01, 0.01, 0.01, 0.01])
+        vec.step(actions)
+        for game, state in enumerate(worlds):
+            state.step([ACTIONS[actions[game]]] if actions[game] else [])
+    different = []
+    for game, state in enumerate(worlds):
+        if (vec.px[game], vec.py[game], vec.points[game], vec.lives[game], vec.bossX[game], vec.bubbleX[game]) != \
+                (state.player.x, state.player.y, state.points, state.player.lives, state.boss.x, state.pointsBubble.x):
+            different.append(seeds[game])
+    return different
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check VecWorld against World and measure its throughput")
+    parser.add_argument("--envs", type=int, default=4096, help="games stepped in lockstep")
+    parser.add_argument("--steps", type=int, default=1000, help="steps to time")
+    parser.add_argument("--parity-games", type=int, default=32, help="games compared with World")
+    args = parser.parse_args(argv)
+
+    different = parityCheck(list(range(args.parity_games)), 5000)
+    print("parity: %d/%d games identical" % (args.parity_games - len(different), args.parity_games))
+    vec = VecWorld(args.envs, autoReset=True)
+    actionSource = np.random.default_rng(1)
+    start = time.perf_counter()
+    for stepNumber in range(args.steps):
+        vec.step(actionSource.integers(0, 3, size=args.envs))
+    elapsed = time.perf_counter() - start
+    print("%d games x %d steps: %.0f game steps per second" % (args.envs, args.steps, args.envs * args.steps / elapsed))
+
+
+if __name__ == "__main__":
+    main()
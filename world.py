@@ -0,0 +1,532 @@
+import math
+import random
+
+from collision import CollisionGrid, segmentExit
+from scheduler import Scheduler
+from triggers import ScoreTriggers
+
+BOUNDARYX = -322, 314  # x axis Boundary
+BOUNDARYY = -264, 264  # y axis Boundary
+SAFEPOS = BOUNDARYX[0]/2 + BOUNDARYX[1]/2, BOUNDARYY[0]/2 + BOUNDARYY[1]/2  # Middle of the arena
+OFFSCREEN = 1000, 1000  # Where the slow bubble waits (hidden) until it is spawned, out of reach of the player
+MINSPEED = 1
+MAXSPEED = 7.4
+SPEEDUNIT = 60  # Units per second moved per point of speed (speed is shown as units per tick at 60 ticks per second)
+
+# Inputs accepted by World.step
+LEFT = "left"  # Turn 30 degrees left
+RIGHT = "right"  # Turn 30 degrees right
+PAUSE = "pause"  # ESC - disables movement
+RESUME = "resume"  # SPACE - enables movement
+UNSTICK = "unstick"  # U - safe position, 3 lives, movement disabled
+SLOW = "slow"  # SHIFT - use a slow bubble
+INPUTS = LEFT, RIGHT, PAUSE, RESUME, UNSTICK, SLOW
+
+# Events returned by World.step
+LIFELOST = "lifeLost"
+POINTSBUBBLE = "pointsBubble"
+SLOWBUBBLE = "slowBubble"
+SLOWBUBBLEUSED = "slowBubbleUsed"
+BOSSSPAWNED = "bossSpawned"
+BOSSDAZED = "bossDazed"
+BOSSHIT = "bossHit"
+BOSSKILLED = "bossKilled"
+BOSSTOUCHED = "bossTouched"
+GAMEOVER = "gameOver"
+
+# Entity kinds (bits, used as collision masks)
+PLAYERKIND = 1
+POINTSBUBBLEKIND = 2
+BOSSKIND = 4
+SLOWBUBBLEKIND = 8
+BUBBLEREACH = 15  # Half the width of the collision box around a bubble
+BOSSREACH = 40  # Half the width of the collision box around the boss
+TICKLENGTH = 1 / 60  # Seconds of game time per step
+KNOCKBACK = 220  # Distance the boss is knocked back when hit
+KNOCKBACKTIME = 0.25  # Seconds the boss takes to fly back (and to come back)
+RECOVERTIME = 1  # Seconds the player can't move after hitting the boss
+
+
+class Entity:
+    """
+    Display independent state of one character (player, bubble or boss)
+    """
+    def __init__(self, x=0, y=0, colour="blue", shape="triangle", charSpeed=0, lives=3, size=1, visible=True,
+                 kind=PLAYERKIND):
+        self.x = x
+        self.y = y
+        self.heading = 0  # Degrees, 0 is east and turning left is positive (same as turtle)
+        self.colour = colour
+        self.shape = shape
+        self.charSpeed = charSpeed
+        self.lives = lives
+        self.size = size
+        self.visible = visible
+        self.kind = kind
+
+    def forward(self, distance):
+        """
+        :param distance: Amount of units to move along the heading (negative moves backwards)
+        """
+        angle = math.radians(self.heading)
+        self.x += distance * math.cos(angle)
+        self.y += distance * math.sin(angle)
+
+    def left(self, angle):
+        self.heading = (self.heading + angle) % 360
+
+    def right(self, angle):
+        self.heading = (self.heading - angle) % 360
+
+    def changeSpeed(self, amount, replace=False):
+        """
+        :param amount: Amount to increase or decrease the speed by/ Amount to change speed to if replace is set to True
+        :param replace: Replaces speed to the specified amount if set to True
+        """
+        if not replace:
+            self.charSpeed += amount
+        else:
+            self.charSpeed = amount
+
+    def changePos(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Rules:
+    """
+    Difficulty curve of a game (the defaults are the normal game), plain attributes so it can be sent to other
+    processes (see simulate.py)
+    """
+    def __init__(self, speedPerBubble=0.2, minSpeed=MINSPEED, maxSpeed=MAXSPEED, bossSpawnPoints=100, bossLives=7,
+                 bossDazePoints=(150, 205, 300, 375, 450, 555, 620), bossDazeInterval=50, slowBubbleStart=560,
+                 slowBubbleInterval=80):
+        """
+        :param speedPerBubble: Speed gained per points bubble
+        :param minSpeed: Lowest speed
+        :param maxSpeed: Highest speed
+        :param bossSpawnPoints: Points at which the boss shows up
+        :param bossLives: Hits needed to kill a boss
+        :param bossDazePoints: Points at which the boss gets dazzed
+        :param bossDazeInterval: Past the last daze point, the boss gets dazzed on every multiple of this
+        :param slowBubbleStart: Points from which slow bubbles spawn
+        :param slowBubbleInterval: A slow bubble spawns on every multiple of this (from slowBubbleStart)
+        """
+        self.speedPerBubble = speedPerBubble
+        self.minSpeed = minSpeed
+        self.maxSpeed = maxSpeed
+        self.bossSpawnPoints = bossSpawnPoints
+        self.bossLives = bossLives
+        self.bossDazePoints = tuple(bossDazePoints)
+        self.bossDazeInterval = bossDazeInterval
+        self.slowBubbleStart = slowBubbleStart
+        self.slowBubbleInterval = slowBubbleInterval
+
+    def asDict(self):
+        """
+        Parameters as a json friendly dict
+        """
+        parameters = dict(vars(self))
+        parameters["bossDazePoints"] = list(self.bossDazePoints)
+        return parameters
+
+
+class World:
+    """
+    Headless game state and rules, advanced one tick at a time with step (no turtle or Tk needed)
+    """
+    def __init__(self, seed=None, pointsBubbles=1, bosses=1, tickLength=TICKLENGTH, rules=None):
+        """
+        :param seed: Seed for bubble spawn positions, a random one is picked if not given
+        :param pointsBubbles: Amount of points bubbles in the arena
+        :param bosses: Amount of bosses in the arena (the first one starts at 200, 200, the others anywhere)
+        :param tickLength: Seconds of game time per step (timed effects are scheduled in seconds)
+        :param rules: Difficulty curve (Rules), the normal game if not given
+        """
+        if pointsBubbles < 1 or bosses < 1:
+            raise ValueError("A world needs at least one points bubble and one boss")
+        self.rules = rules or Rules()
+        self.random = random.Random()
+        self.player = Entity()
+        self.pointsBubbles = [Entity(shape="circle", colour="red", kind=POINTSBUBBLEKIND)
+                              for bubble in range(pointsBubbles)]
+        self.bosses = [Entity(shape="circle", size=4, kind=BOSSKIND) for boss in range(bosses)]
+        self.slowBubble = Entity(shape="circle", colour="pink", kind=SLOWBUBBLEKIND)
+        self.pointsBubble = self.pointsBubbles[0]
+        self.boss = self.bosses[0]
+        self.grid = CollisionGrid()
+        self.playerIndex = self.grid.add(self.player, 0, PLAYERKIND, POINTSBUBBLEKIND | BOSSKIND | SLOWBUBBLEKIND)
+        for bubble in self.pointsBubbles:
+            self.grid.add(bubble, BUBBLEREACH, POINTSBUBBLEKIND)
+        for boss in self.bosses:
+            self.grid.add(boss, BOSSREACH, BOSSKIND, POINTSBUBBLEKIND)
+        self.grid.add(self.slowBubble, BUBBLEREACH, SLOWBUBBLEKIND)
+        self.tickLength = tickLength
+        self.speedScale = SPEEDUNIT * tickLength  # Distance per tick at speed 1 (1 at 60 ticks per second)
+        self.scheduler = Scheduler()
+        self.triggers = self.scoreTriggers()
+        # Rules run by step, in order, grouped by subsystem so they can be timed (see profiler.py)
+        self.phases = (("movement", self.movement), ("boundary", self.boundaryPackage),
+                       ("collisions", self.collisionPackage), ("boss", self.bossCollision))
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        :param seed: Seed for the new game, a random one is picked if not given
+        Puts everything back to the start of a game, reusing the same entities (so whatever draws them stays valid)
+        """
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.random.seed(self.seed)
+        self.player.changePos(0, 0)
+        self.player.heading = 0
+        self.player.colour = "blue"
+        self.player.charSpeed = 1
+        self.player.lives = 3
+        for bubble in self.pointsBubbles:
+            bubble.changePos(*self.randomPos())
+        for number, boss in enumerate(self.bosses):
+            boss.changePos(*(self.randomPos() if number else (200, 200)))
+            boss.colour = "black"
+            boss.lives = self.rules.bossLives
+            boss.visible = False
+        self.slowBubble.changePos(*OFFSCREEN)
+        self.slowBubble.visible = False
+        self.scheduler.clear()
+        self.lastHitBoss = None  # Boss of the latest BOSSHIT event
+        self.contacts = []  # Overlapping pairs of the current tick
+        self.moveFrom = 0, 0  # Where the player's movement of the current tick started
+        self.playerMove = True  # Player movement
+        self.stunned = False  # Player recovering from a boss hit (can't move)
+        self.slowBubbles = 0  # Slow bubbles the player has collected
+        self.needsUnsticking = False
+        self.slowBubbleNeedsShowing = False
+        self.slowBubbleConfigured = False  # slow bubble visibility options
+        self.bossConfigured = False  # Avoid constant spawning
+        self.bossDazzed = False  # Allows boss to be hit by player
+        self.gameOver = False
+        self.points = 0
+        self.triggers.rewind(0)
+        self.ticks = 0
+        self.events = []
+
+    def scoreTriggers(self):
+        """
+        Compiles the point thresholds of the rules (boss spawn, boss daze points, slow bubble spawns)
+        """
+        rules = self.rules
+        triggers = ScoreTriggers()
+        triggers.at(rules.bossSpawnPoints, self.bossSpawn)
+        for points in rules.bossDazePoints:
+            triggers.at(points, self.bossState)
+        lastDazePoints = rules.bossDazePoints[-1] if rules.bossDazePoints else 0
+        # Past the last daze point the boss gets dazzed again if points were gathered without attacking it
+        triggers.every(rules.bossDazeInterval, self.bossRedaze,
+                       (lastDazePoints // rules.bossDazeInterval + 1) * rules.bossDazeInterval)
+        triggers.every(rules.slowBubbleInterval, self.slowBubbleSpawn, rules.slowBubbleStart)
+        return triggers
+
+    def randomPos(self):
+        """
+        Random position inside the boundary
+        """
+        return self.random.randint(BOUNDARYX[0], BOUNDARYX[1]), self.random.randint(BOUNDARYY[0], BOUNDARYY[1])
+
+    def step(self, inputs=()):
+        """
+        :param inputs: Inputs received since the last step (see INPUTS)
+        Advances the game by one tick and returns the events that happened during it
+        """
+        self.events = []
+        for name in inputs:
+            self.applyInput(name)
+        for name, phase in self.phases:
+            phase()
+        self.ticks += 1
+        return self.events
+
+    def movement(self):
+        """
+        Runs due timed effects, then moves the player forward if it can move (speed is per second, so the
+        distance per tick follows the tick length)
+        """
+        self.scheduler.advance(self.tickLength)
+        self.moveFrom = self.player.x, self.player.y
+        if self.playerMove and not self.stunned:
+            self.player.forward(self.player.charSpeed * self.speedScale)
+
+    def boundaryPackage(self):
+        """
+        Boundary, stuck, speed and lives rules
+        """
+        self.boundaryCheck()
+        self.stuckCheck()
+        self.speedCap()
+        self.livesValidation()
+
+    def entities(self):
+        """
+        Every entity of the world (drawing order)
+        """
+        return [self.player] + self.pointsBubbles + self.bosses + [self.slowBubble]
+
+    def collisionPackage(self):
+        """
+        Finds every overlapping pair of the tick in one grid query, then runs the points bubble and slow bubble
+        rules (the boss rules use the same pairs). The player is tested along the whole path of its move.
+        """
+        self.grid.sweep(self.playerIndex, *self.moveFrom)
+        self.contacts = self.grid.pairs()
+        self.slowBubbleCollision()
+        self.pointsBubbleCollision()
+        self.slowBubbleVisibility()
+
+    def applyInput(self, name):
+        """
+        :param name: One of INPUTS
+        """
+        if name == LEFT:
+            self.player.left(30)
+        elif name == RIGHT:
+            self.player.right(30)
+        elif name == PAUSE:
+            self.playerMove = False
+        elif name == RESUME:
+            self.playerMove = True
+        elif name == UNSTICK:
+            # Moves the player to a safe position on the next stuckCheck, sets lives to 3 and disables movement
+            self.needsUnsticking = True
+            self.player.lives = 3
+            self.playerMove = False
+        elif name == SLOW:  # Use a slow bubble which lowers player speed by 1
+            if self.slowBubbles >= 1 and self.player.charSpeed > self.rules.minSpeed:
+                self.slowBubbles -= 1
+                self.player.changeSpeed(-1)
+                self.events.append(SLOWBUBBLEUSED)
+
+    def setPoints(self, points):
+        """
+        :param points: Amount of points
+        Changes points to the specified amount
+        """
+        self.points = points
+        self.player.changeSpeed(self.rules.speedPerBubble * points/10)
+        self.speedCap()
+        self.triggers.update(points)
+
+    def addPoints(self, amount):
+        """
+        :param amount: Points gained
+        Every change of points goes through here so the score triggers fire
+        """
+        self.points += amount
+        self.triggers.update(self.points)
+
+    def continueGame(self, lives=10000):
+        """
+        Lets the player carry on after game over (the "ignore" option)
+        """
+        self.player.lives = lives
+        self.gameOver = False
+
+    def boundaryCheck(self):
+        """
+        Turns the player around and removes a life if player hits the boundary
+
+        The move of the tick is cut where it left the arena (a player already outside is put back on the
+        boundary), so however far a tick moves the player never ends up outside or bounces twice on a corner.
+        """
+        player = self.player
+        x, y = player.x, player.y
+        if BOUNDARYX[0] <= x <= BOUNDARYX[1] and BOUNDARYY[0] <= y <= BOUNDARYY[1]:
+            return
+        fromX, fromY = self.moveFrom
+        fraction = segmentExit(fromX, fromY, x, y, BOUNDARYX[0], BOUNDARYX[1], BOUNDARYY[0], BOUNDARYY[1])
+        player.changePos(min(max(fromX + (x - fromX) * fraction, BOUNDARYX[0]), BOUNDARYX[1]),
+                         min(max(fromY + (y - fromY) * fraction, BOUNDARYY[0]), BOUNDARYY[1]))
+        player.left(180)
+        player.lives -= 1
+        self.events.append(LIFELOST)
+
+    def teleport(self, x, y):
+        """
+        Moves the player without sweeping through everything on the way
+        """
+        self.player.changePos(x, y)
+        self.moveFrom = x, y
+
+    def stuckCheck(self):
+        """
+        Moves the player to a safe position if it asked to be unstuck
+        """
+        if self.needsUnsticking:
+            self.teleport(*SAFEPOS)
+            self.needsUnsticking = False
+
+    def speedCap(self):
+        """
+        Speed boundary which doesn't let the player exceed maxSpeed (7.4) or fall under minSpeed (1)
+        """
+        if round(self.player.charSpeed, 2) >= self.rules.maxSpeed:
+            self.player.changeSpeed(self.rules.maxSpeed, True)
+        if round(self.player.charSpeed, 2) <= self.rules.minSpeed:
+            self.player.changeSpeed(self.rules.minSpeed, True)
+
+    def livesValidation(self):
+        """
+        Ends the game when lives hit 0
+        """
+        if self.player.lives <= 0 and not self.gameOver:
+            self.playerMove = False
+            self.teleport(2000, 2000)
+            self.gameOver = True
+            self.events.append(GAMEOVER)
+
+    def pointsBubbleCollision(self):
+        """
+        Collision between pointsBubble and player
+        """
+        for first, second in self.contacts:
+            if first is self.player and second.kind == POINTSBUBBLEKIND:
+                second.changePos(*self.randomPos())
+                self.addPoints(10)
+                self.player.changeSpeed(self.rules.speedPerBubble)
+                if self.player.lives < 3:  # Lives reset to 3 when you hit pointsBubble
+                    self.player.lives = 3
+                self.events.append(POINTSBUBBLE)
+
+    def bossSpawn(self, threshold):
+        """
+        :param threshold: Points reached (bossSpawnPoints, 100 normally)
+        Makes boss visible once points reach 100
+        """
+        if not self.bossConfigured:
+            for boss in self.bosses:
+                boss.visible = True
+            self.events.append(BOSSSPAWNED)
+        self.bossConfigured = True
+        self.dazeBosses(False)
+
+    def dazeBosses(self, dazzed):
+        """
+        :param dazzed: New dazzed state
+        Changes colours between black (not dazzed) and gold (dazzed)
+        """
+        self.bossDazzed = dazzed
+        colour = "Gold" if dazzed else "Black"
+        for boss in self.bosses:
+            boss.colour = colour
+
+    def bossCollision(self):
+        """
+        Collision between player and boss (and pointsBubble and boss) and the rules of boss
+        """
+        if not self.bossConfigured:
+            return
+        hit = False
+        for first, second in self.contacts:
+            if second.kind != BOSSKIND:
+                continue
+            if first.kind == POINTSBUBBLEKIND:  # if points bubble collides with boss
+                first.changePos(*self.randomPos())
+            elif first is self.player and not hit:  # The player is moved away after a hit, other pairs are stale
+                if self.bossDazzed:
+                    hit = True
+                    self.hitBoss(second)
+                else:
+                    self.player.lives -= 5
+                    self.events.append(BOSSTOUCHED)
+
+    def hitBoss(self, boss):
+        """
+        :param boss: Boss the player hit while it was dazzed
+        """
+        boss.lives -= 1
+        self.teleport(*SAFEPOS)
+        self.lastHitBoss = boss
+        self.events.append(BOSSHIT)
+        self.dazeBosses(False)  # Before the points, they can cross the next daze point
+        if boss.lives >= 1:
+            self.player.changeSpeed(-0.8)
+            self.addPoints(25)
+        else:
+            self.player.changeSpeed(-1.6)
+            self.addPoints(250)
+            self.events.append(BOSSKILLED)
+        self.knockBack(boss)
+
+    def knockBack(self, boss):
+        """
+        :param boss: Boss that was hit
+        Knocks the boss back and lets it return (moved out of the arena instead if it has no lives left), while
+        the player recovers without being able to move. Played by the scheduler, nothing waits for it.
+        """
+        startX, startY = boss.x, boss.y
+        angle = math.radians(boss.heading)
+        backX = -KNOCKBACK * math.cos(angle)
+        backY = -KNOCKBACK * math.sin(angle)
+
+        def flyBack(progress):
+            boss.changePos(startX + backX * progress, startY + backY * progress)
+
+        def comeBack(progress):
+            boss.changePos(startX + backX * (1 - progress), startY + backY * (1 - progress))
+
+        def recovered():
+            self.stunned = False
+
+        self.stunned = True
+        self.scheduler.tween(KNOCKBACKTIME, flyBack)
+        if boss.lives >= 1:
+            self.scheduler.tween(KNOCKBACKTIME, comeBack, delay=2 * KNOCKBACKTIME)
+        else:
+            self.scheduler.after(2 * KNOCKBACKTIME, lambda: boss.changePos(4000, 4000))
+        self.scheduler.after(RECOVERTIME, recovered)
+
+    def bossState(self, threshold):
+        """
+        :param threshold: Daze point reached
+        Dazes the boss (once it has spawned)
+        """
+        if not self.bossConfigured:
+            return
+        if not self.bossDazzed:
+            self.events.append(BOSSDAZED)
+        self.dazeBosses(True)
+
+    def bossRedaze(self, threshold):
+        """
+        :param threshold: Multiple of bossDazeInterval past the last daze point reached
+        """
+        if any(boss.lives > 1 for boss in self.bosses):
+            self.bossState(threshold)
+
+    def slowBubbleSpawn(self, threshold):
+        """
+        :param threshold: Multiple of slowBubbleInterval reached (every 80 points from 560)
+        Spawns the slow bubble unless it is already in the arena
+        """
+        if not self.slowBubbleConfigured:
+            self.slowBubbleNeedsShowing = True
+            self.slowBubbleConfigured = True
+
+    def slowBubbleCollision(self):
+        """
+        Collision between slow bubble and player
+        """
+        for first, second in self.contacts:
+            if first is self.player and second is self.slowBubble:
+                self.slowBubbles += 1
+                self.slowBubble.changePos(*OFFSCREEN)
+                self.slowBubble.visible = False
+                self.slowBubbleConfigured = False  # Before the points, they can reach the next spawn
+                self.addPoints(10)
+                self.events.append(SLOWBUBBLE)
+
+    def slowBubbleVisibility(self):
+        """
+        Moves the slow bubble into the arena once it has been spawned
+        """
+        if self.slowBubbleNeedsShowing:
+            self.slowBubble.changePos(*self.randomPos())
+            self.slowBubble.visible = True
+            self.slowBubbleNeedsShowing = False